@@ -0,0 +1,137 @@
+import json
+import os
+import shutil
+import zipfile
+
+import pandas as pd
+import requests
+
+from visaxlsx import read_smi
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def fetch_workbook(url, cache_dir=CACHE_DIR):
+    """
+    Keep a local copy of the Visa workbook, downloading it only when it changed.
+
+    URLs are revalidated with If-None-Match / If-Modified-Since. A local path
+    stands in for the URL, in which case the file's mtime and size decide
+    whether it changed.
+
+    Args:
+        url (str): URL of the Excel file, or a path to a local copy.
+        cache_dir (str): Directory for the cached workbook and its metadata.
+
+    Returns:
+        tuple: (path to the cached workbook, True if it changed).
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, "appendix.xlsx")
+    meta_path = os.path.join(cache_dir, "appendix.json")
+    meta = _read_json(meta_path) if os.path.exists(path) else {}
+
+    if os.path.exists(url):
+        stat = os.stat(url)
+        tag = f"{stat.st_mtime_ns}-{stat.st_size}"
+        if meta.get("source") == url and meta.get("tag") == tag:
+            return path, False
+        shutil.copyfile(url, path + ".tmp")
+        meta = {"source": url, "tag": tag}
+    else:
+        headers = {}
+        if meta.get("source") == url:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        response = requests.get(url, headers=headers, timeout=60)
+        if response.status_code == 304:
+            return path, False
+        response.raise_for_status()
+        with open(path + ".tmp", "wb") as f:
+            f.write(response.content)
+        meta = {
+            "source": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+
+    os.replace(path + ".tmp", path)
+    _write_json(meta_path, meta)
+    return path, True
+
+
+def sheet_fingerprints(path):
+    """
+    CRCs of the worksheet and shared-string parts of an .xlsx file.
+
+    An .xlsx file is a zip archive, and its directory already stores a CRC
+    for every part, so this reads no cell data. A workbook that was re-saved
+    or had only its properties touched keeps the same fingerprints.
+
+    Args:
+        path (str): Path to the workbook.
+
+    Returns:
+        dict: Part name -> CRC.
+    """
+    with zipfile.ZipFile(path) as z:
+        return {
+            info.filename: info.CRC
+            for info in z.infolist()
+            if info.filename.startswith("xl/worksheets/")
+            or info.filename == "xl/sharedStrings.xml"
+        }
+
+
+def load_cached(url, cache_dir=CACHE_DIR, rebuild=False):
+    """
+    Load the Visa SMI series, parsing the workbook only when its data changed.
+
+    The cleaned series are kept as Parquet next to the cached workbook. When
+    the workbook's sheets change, the cached series is replaced by a fresh
+    parse: the SMI is seasonally adjusted, so each release revises past
+    months as well as adding new ones.
+
+    Args:
+        url (str): URL of the Excel file, or a path to a local copy.
+        cache_dir (str): Cache directory.
+        rebuild (bool): Ignore the cached series and re-parse everything.
+
+    Returns:
+        pd.DataFrame: Same layout as ``load_data``.
+    """
+    workbook, changed = fetch_workbook(url, cache_dir)
+    series_path = os.path.join(cache_dir, "series.parquet")
+    state_path = os.path.join(cache_dir, "series.json")
+    state = _read_json(state_path) if os.path.exists(series_path) else {}
+
+    if state and not rebuild and not changed:
+        return pd.read_parquet(series_path)
+
+    # The workbook was downloaded again, but its sheets may be byte-for-byte the same
+
+    fingerprints = sheet_fingerprints(workbook)
+    if state and not rebuild and state.get("sheets") == fingerprints:
+        return pd.read_parquet(series_path)
+
+    df = read_smi(workbook)
+    df.reset_index(drop=True).to_parquet(series_path + ".tmp", index=False)
+    os.replace(series_path + ".tmp", series_path)
+    _write_json(state_path, {"sheets": fingerprints, "rows": len(df)})
+    return df
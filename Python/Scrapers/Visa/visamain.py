@@ -1,8 +1,9 @@
-from visautils import load_data, plot_data
+from visacache import load_cached
+from visautils import plot_data
 import matplotlib.pyplot as plt
 
 url = "https://usa.visa.com/content/dam/VCOM/regional/na/us/partner-with-us/economic-insights/documents/vbei-visa-us-smi-data-appendix.xlsx"
 
-plot_data(load_data(url))
+plot_data(load_cached(url))
 
 plt.savefig("Python/Scrapers/Visa/VisaSpending.png")
@@ -0,0 +1,217 @@
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_COLUMNS = {}
+
+
+def _column_index(ref):
+    """Zero-based column index of a cell reference such as "AB12"."""
+    letters = ref.rstrip("0123456789")
+    if letters not in _COLUMNS:
+        index = 0
+        for letter in letters:
+            index = index * 26 + ord(letter) - 64
+        _COLUMNS[letters] = index - 1
+    return _COLUMNS[letters]
+
+
+def _first_sheet(z):
+    """Path inside the archive of the workbook's first sheet, and the date epoch."""
+    workbook = ET.fromstring(z.read("xl/workbook.xml"))
+    props = workbook.find(f"{NS}workbookPr")
+    date1904 = props is not None and props.get("date1904") in ("1", "true")
+    rel_id = workbook.find(f"{NS}sheets/{NS}sheet").get(f"{REL_NS}id")
+    rels = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+    target = next(
+        rel.get("Target") for rel in rels.iter(f"{PKG_REL_NS}Relationship") if rel.get("Id") == rel_id
+    )
+    path = target.lstrip("/") if target.startswith("/") else posixpath.join("xl", target)
+    return posixpath.normpath(path), "1904-01-01" if date1904 else "1899-12-30"
+
+
+def _shared_strings(z):
+    """Shared string table, read one entry at a time."""
+    if "xl/sharedStrings.xml" not in z.namelist():
+        return []
+    strings = []
+    with z.open("xl/sharedStrings.xml") as f:
+        for _, elem in ET.iterparse(f):
+            if elem.tag == f"{NS}si":
+                # Rich text is split into runs; phonetic hints (rPh) are not part of the text
+
+                parts = [child for child in elem if child.tag in (f"{NS}t", f"{NS}r")]
+                strings.append(
+                    "".join(
+                        part.text or "" if part.tag == f"{NS}t" else part.findtext(f"{NS}t", "")
+                        for part in parts
+                    )
+                )
+                elem.clear()
+    return strings
+
+
+def _cell_value(cell, strings):
+    kind = cell.get("t", "n")
+    if kind == "inlineStr":
+        return "".join(t.text or "" for t in cell.iter(f"{NS}t"))
+    v = cell.find(f"{NS}v")
+    if v is None or v.text is None:
+        return None
+    if kind == "s":
+        return strings[int(v.text)]
+    if kind == "n":
+        return float(v.text)
+    if kind == "b":
+        return v.text == "1"
+    return v.text
+
+
+def _rows(z, sheet):
+    """
+    Yield the sheet's <row> elements one at a time.
+
+    Each row is removed from the tree once the consumer moves on, so memory
+    does not grow with the number of rows.
+    """
+    with z.open(sheet) as f:
+        sheet_data = None
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                if elem.tag == f"{NS}sheetData":
+                    sheet_data = elem
+            elif elem.tag == f"{NS}row":
+                yield elem
+                sheet_data.clear()
+
+
+def _cells(row, strings, wanted=None):
+    """Non-empty cells of a row as column index -> value, limited to ``wanted``."""
+    values = {}
+    for position, cell in enumerate(row):
+        ref = cell.get("r")
+        i = _column_index(ref) if ref else position
+        if wanted is not None and i not in wanted:
+            continue
+        value = _cell_value(cell, strings)
+        if value is not None and value != "":
+            values[i] = value
+    return values
+
+
+class _Header:
+    """
+    Two-row header flattened the way ``pd.read_excel(header=[0, 1])`` does.
+
+    Blank cells are forward-filled within the same parent group, leftovers
+    become "Unnamed: <column>_level_<row>", and the two levels are joined
+    with a space.
+    """
+
+    def __init__(self, top, sub):
+        self.rows = [[], []]
+        self.control = []
+        self.source = [top, sub]
+        self.extend(max(list(top) + list(sub) + [-1]) + 1)
+
+    def extend(self, width):
+        for i in range(len(self.control), width):
+            control = True
+            for level, row in enumerate(self.rows):
+                value = self.source[level].get(i, "")
+                if value == "":
+                    if i > 0 and control:
+                        value = row[i - 1]
+                else:
+                    control = False
+                row.append(value)
+            self.control.append(control)
+
+    def name(self, i):
+        self.extend(i + 1)
+        parts = [
+            f"Unnamed: {i}_level_{level}" if row[i] == "" else str(row[i])
+            for level, row in enumerate(self.rows)
+        ]
+        return " ".join(parts).strip().replace("\n", " ")
+
+
+def read_smi(path):
+    """
+    Stream the Visa SMI appendix into the same DataFrame as ``load_data``.
+
+    Rows of the first sheet are read from the XML one at a time, and only the
+    ``Headline Date`` column and the seasonally adjusted columns are kept.
+    The rest of each row is discarded as it is read, so peak memory follows
+    the size of the kept series rather than the workbook.
+
+    Args:
+        path (str or file): Path to the .xlsx file, or a binary file object.
+
+    Returns:
+        pd.DataFrame: Processed DataFrame.
+    """
+    with zipfile.ZipFile(path) as z:
+        sheet, epoch = _first_sheet(z)
+        strings = _shared_strings(z)
+        rows = _rows(z, sheet)
+
+        # Blank rows are skipped, as pandas does
+
+        header_rows = []
+        for row in rows:
+            cells = _cells(row, strings)
+            if cells:
+                header_rows.append(cells)
+            if len(header_rows) == 2:
+                break
+        header = _Header(*(header_rows + [{}, {}])[:2])
+
+        # The first two columns are ignored, as are the non-seasonally adjusted ones
+
+        keep, date_column = {}, None
+        for i in range(2, len(header.control)):
+            name = header.name(i)
+            if name == "Headline Date":
+                date_column = i
+            elif "Seasonally adjusted" in name and "Non-Seas" not in name:
+                keep[i] = name
+        wanted = set(keep) | {date_column}
+
+        # Hold each row back by one, because the last row of the sheet is a footnote
+
+        dates, values = [], {i: [] for i in keep}
+        previous = None
+        for row in rows:
+            if len(row) == 0:
+                continue
+            cells = _cells(row, strings, wanted)
+            if not cells and not _cells(row, strings):
+                continue
+            if previous is not None:
+                dates.append(previous.get(date_column))
+                for i, column in values.items():
+                    column.append(previous.get(i, np.nan))
+            previous = cells
+
+    # Excel stores dates as days since the epoch
+
+    serial = pd.Series(dates, dtype=object)
+    numeric = serial.map(lambda v: isinstance(v, float))
+    parsed = pd.to_datetime(serial.where(~numeric))
+    if numeric.any():
+        parsed[numeric] = pd.to_datetime(
+            serial[numeric].astype(float), unit="D", origin=pd.Timestamp(epoch)
+        ).dt.round("s")
+
+    columns = {"Headline Date": parsed, "Month-Year": parsed.dt.strftime("%b %Y")}
+    for i, name in keep.items():
+        columns[name] = pd.to_numeric(pd.Series(values[i], dtype=object), errors="coerce")
+    return pd.DataFrame(columns)
@@ -1,16 +1,17 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+
+from pagemonitor import monitor
 
 url = "https://zhentaoshi.github.io/papersbyyears/"
 text_to_check = "Relaxed Balancing for Synthetic Control"
 
-response = requests.get(url)
-soup = BeautifulSoup(response.text, "html.parser")
+# Check if the text is hyperlinked. No state is kept, so every run reports it.
+new, errors = asyncio.run(monitor([{"url": url, "patterns": [text_to_check]}], {}))
 
-# Check if the text is hyperlinked
-linked = any(a for a in soup.find_all("a") if text_to_check in a.get_text())
+if errors:
+    raise SystemExit(f"Could not check {url}: {errors[0]['error']}")
 
-if linked:
+if new:
     print("Paper is now available! Exiting with failure to trigger notification.")
     exit(1)  # Fail intentionally to trigger GitHub Actions email
 else:
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+
+class ArtistStore:
+    """
+    Artist time series held as contiguous, date-sorted NumPy arrays.
+
+    The rows are sorted by artist and date once, so each artist's series is a
+    single block of every column and a date range within it is found by
+    binary search. Selecting a few artists costs time proportional to the
+    rows returned, not to the size of the whole dataset.
+
+    Args:
+        data (pd.DataFrame): Data with ``Artist`` and ``Date`` columns; every
+            other column is treated as a metric.
+    """
+
+    def __init__(self, data):
+        data = data.dropna(subset=["Artist", "Date"]).sort_values(
+            ["Artist", "Date"], kind="stable"
+        )
+        artists = data["Artist"].to_numpy()
+
+        # Row offsets where each artist's block starts and ends
+
+        starts = np.flatnonzero(np.r_[True, artists[1:] != artists[:-1]])
+        bounds = np.r_[starts, len(artists)]
+        self.artists = [str(a) for a in artists[starts]]
+        self.offsets = {
+            artist: (int(bounds[i]), int(bounds[i + 1]))
+            for i, artist in enumerate(self.artists)
+        }
+
+        self.dates = data["Date"].to_numpy(dtype="datetime64[ns]")
+        self.metrics = [col for col in data.columns if col not in ["Artist", "Date"]]
+        self.values = {
+            col: pd.to_numeric(data[col], errors="coerce").to_numpy(dtype=float)
+            for col in self.metrics
+        }
+        self.min_date = pd.Timestamp(self.dates.min()).date()
+        self.max_date = pd.Timestamp(self.dates.max()).date()
+
+    def freeze(self):
+        """
+        Make the store immutable, so one instance can serve every session.
+
+        The arrays become read-only (selections are views into them) and the
+        artist and metric lists become tuples.
+
+        Returns:
+            ArtistStore: self.
+        """
+        self.dates.setflags(write=False)
+        for values in self.values.values():
+            values.setflags(write=False)
+        self.artists = tuple(self.artists)
+        self.metrics = tuple(self.metrics)
+        return self
+
+    def nbytes(self):
+        """Bytes held in the store's arrays."""
+        return self.dates.nbytes + sum(values.nbytes for values in self.values.values())
+
+    def __len__(self):
+        return len(self.dates)
+
+    def _span(self, artist, start=None, end=None):
+        lo, hi = self.offsets[artist]
+        dates = self.dates[lo:hi]
+        first, last = lo, hi
+        if start is not None:
+            first = lo + np.searchsorted(dates, np.datetime64(start, "ns"), "left")
+        if end is not None:
+            last = lo + np.searchsorted(dates, np.datetime64(end, "ns"), "right")
+        return int(first), int(last)
+
+    def series(self, artist, metric, start=None, end=None):
+        """
+        One artist's series, optionally limited to a date range.
+
+        Args:
+            artist (str): Artist name.
+            metric (str): Metric column.
+            start, end (date): Inclusive date bounds; None leaves a side open.
+
+        Returns:
+            tuple: (dates, values) as NumPy array views.
+        """
+        first, last = self._span(artist, start, end)
+        return self.dates[first:last], self.values[metric][first:last]
+
+    def select(self, artists, metric, start=None, end=None):
+        """
+        Series for several artists.
+
+        Args:
+            artists (list): Artist names. Unknown names are skipped.
+            metric (str): Metric column.
+            start, end (date): Inclusive date bounds.
+
+        Returns:
+            dict: Artist name -> (dates, values), in the order given.
+        """
+        return {
+            artist: self.series(artist, metric, start, end)
+            for artist in artists
+            if artist in self.offsets
+        }
@@ -0,0 +1,291 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+import requests
+
+from partitions import PartitionedSeries
+
+# Where the scraped CSVs live, relative to the repository root. DASH_RAW_URL points
+# the dashboard at another server, such as the load test's local stand-in.
+
+RAW_URL = os.environ.get(
+    "DASH_RAW_URL",
+    "https://raw.githubusercontent.com/jgreathouse9/jgreathouse9.github.io/refs/heads/master/",
+)
+
+PATHS = {
+    "Spotify": "Spotify/Merged_Spotify_Data.csv",
+    "Apple Music": "Apple Music/AppleMusic.csv",
+}
+
+# Date-partitioned Parquet copies of the same series (see partitions.py), used
+# instead of the CSVs when DASH_DATA_DIR holds them
+
+PARTITION_PATHS = {
+    "Spotify": "Spotify/partitions",
+    "Apple Music": "Apple Music/partitions",
+}
+
+SNAPSHOT_DIR = os.environ.get(
+    "DASH_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".snapshots"),
+)
+
+
+class StaleSnapshot(Exception):
+    """The snapshot moved to a new version while a reader expected an older one."""
+
+
+def _digest(body):
+    return hashlib.sha1(body).hexdigest()
+
+
+class HTTPSource:
+    """
+    Fetch a CSV over HTTP, revalidating with ETag / If-None-Match.
+
+    Args:
+        url (str): URL of the CSV file.
+        timeout (float): Seconds to wait for the server before giving up.
+    """
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch(self, etag=None):
+        """
+        Download the file unless the server says our copy is current.
+
+        Args:
+            etag (str): ETag of the copy we already hold, if any.
+
+        Returns:
+            tuple: (body, etag). ``body`` is None when the file is unchanged.
+        """
+        headers = {"If-None-Match": etag} if etag else {}
+        response = requests.get(self.url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return None, etag
+        response.raise_for_status()
+        return response.content, response.headers.get("ETag") or _digest(response.content)
+
+
+class FileSource:
+    """
+    Offline stand-in for HTTPSource that reads a file from disk.
+
+    The file's mtime and size play the part of the ETag, so an unchanged file
+    is never re-read.
+
+    Args:
+        path (str): Path to the CSV file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self, etag=None):
+        stat = os.stat(self.path)
+        tag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        if tag == etag:
+            return None, etag
+        with open(self.path, "rb") as f:
+            return f.read(), tag
+
+
+class PartitionSource:
+    """
+    Offline source that reads a date-partitioned store from disk.
+
+    The store's version, a hash of its file listing, plays the part of the
+    ETag. ``fetch`` returns the typed frame rather than CSV bytes.
+
+    Args:
+        directory (str): Directory holding the partitions.
+    """
+
+    def __init__(self, directory):
+        self.store = PartitionedSeries(directory)
+
+    def fetch(self, etag=None):
+        tag = f'"{self.store.version()}"'
+        if tag == etag:
+            return None, etag
+        return self.store.read(), tag
+
+
+def make_source(platform):
+    """
+    Build the source for a platform.
+
+    Setting ``DASH_DATA_DIR`` to a checkout (or any directory laid out like the
+    repository) reads the data from disk instead of GitHub: the partitioned
+    store when there is one, the CSV otherwise.
+
+    Args:
+        platform (str): "Spotify" or "Apple Music".
+
+    Returns:
+        HTTPSource, FileSource or PartitionSource
+    """
+    data_dir = os.environ.get("DASH_DATA_DIR")
+    if data_dir:
+        partitions = os.path.join(data_dir, PARTITION_PATHS[platform])
+        if os.path.isdir(partitions):
+            return PartitionSource(partitions)
+        return FileSource(os.path.join(data_dir, PATHS[platform]))
+    return HTTPSource(RAW_URL + PATHS[platform].replace(" ", "%20"))
+
+
+def parse_csv(body):
+    """
+    Parse the raw CSV bytes into the frame the dashboard plots.
+
+    Args:
+        body (bytes): Contents of the CSV file.
+
+    Returns:
+        pd.DataFrame: Data with ``Date`` parsed to datetimes.
+    """
+    data = pd.read_csv(io.BytesIO(body))
+    # Spotify dates carry a time of day ("2024-01-01 00:00:00"); the day is kept
+    data["Date"] = pd.to_datetime(
+        data["Date"], format="ISO8601", errors="coerce"
+    ).dt.normalize()
+    return data
+
+
+class Snapshot:
+    """
+    Local Parquet copy of one platform's data.
+
+    ``refresh`` revalidates against the source at most once per ``ttl``
+    seconds, and ``start`` does so from a daemon thread, so readers only
+    ever touch the local file.
+
+    Args:
+        name (str): Platform name, used for the snapshot's file name.
+        source (HTTPSource, FileSource or PartitionSource): Where the data
+            comes from.
+        directory (str): Directory holding the snapshot and its metadata.
+        ttl (float): Seconds before the snapshot is revalidated.
+    """
+
+    def __init__(self, name, source, directory=SNAPSHOT_DIR, ttl=300):
+        self.name = name
+        self.source = source
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+        stem = name.lower().replace(" ", "_")
+        self.path = os.path.join(directory, stem + ".parquet")
+        self.meta_path = os.path.join(directory, stem + ".json")
+        self.meta = self._read_meta()
+        self._lock = threading.Lock()
+        # Held only while the file and its version change together
+        self._swap = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _read_meta(self):
+        if not (os.path.exists(self.meta_path) and os.path.exists(self.path)):
+            return {}
+        with open(self.meta_path) as f:
+            return json.load(f)
+
+    def _write_meta(self, meta):
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.meta_path)
+        self.meta = meta
+
+    @property
+    def version(self):
+        """ETag of the snapshot on disk, or None before the first download."""
+        return self.meta.get("etag")
+
+    def is_stale(self):
+        return time.time() - self.meta.get("checked", 0) >= self.ttl
+
+    def refresh(self, force=False):
+        """
+        Revalidate the snapshot if it is missing or older than the TTL.
+
+        Args:
+            force (bool): Revalidate even if the TTL has not expired.
+
+        Returns:
+            bool: True if a new snapshot was written.
+        """
+        with self._lock:
+            if self.version and not (force or self.is_stale()):
+                return False
+            body, etag = self.source.fetch(self.version)
+            meta = dict(self.meta, checked=time.time())
+            if body is not None:
+                # Write to a temporary file first so readers never see a partial snapshot
+
+                tmp = self.path + ".tmp"
+                data = body if isinstance(body, pd.DataFrame) else parse_csv(body)
+                data.to_parquet(tmp, index=False)
+                meta["etag"] = etag
+                with self._swap:
+                    os.replace(tmp, self.path)
+                    self._write_meta(meta)
+            else:
+                self._write_meta(meta)
+            return body is not None
+
+    def read(self):
+        """
+        Load the snapshot from disk.
+
+        Returns:
+            pd.DataFrame: The platform's data.
+        """
+        return pd.read_parquet(self.path)
+
+    def read_versioned(self):
+        """
+        Load the snapshot together with the version it belongs to.
+
+        The two are read under the lock a refresh holds while it swaps in a
+        new file, so the data is never paired with another version's tag.
+
+        Returns:
+            tuple: (version, pd.DataFrame).
+        """
+        with self._swap:
+            return self.version, pd.read_parquet(self.path)
+
+    def start(self, interval=None):
+        """
+        Refresh the snapshot from a daemon thread.
+
+        Args:
+            interval (float): Seconds between checks. Defaults to the TTL.
+        """
+        if self._thread is not None:
+            return
+        interval = self.ttl if interval is None else interval
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as exc:  # keep serving the old snapshot
+                    print(f"Refreshing the {self.name} snapshot failed: {exc}")
+
+        self._thread = threading.Thread(
+            target=loop, name=f"snapshot-{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,93 @@
+import numpy as np
+
+# Derived series offered next to the raw metrics. Rolling means and growth
+# rates are computed for every artist at once, when the store is built for a
+# data version, so switching to one costs a rerun nothing extra.
+
+ROLLING_DAYS = {"7-day avg": 7, "30-day avg": 30}
+GROWTH_DAYS = {"WoW growth %": 7}
+
+
+def _day_keys(store):
+    """One sortable integer per row: artist block, then day number."""
+    days = store.dates.astype("datetime64[D]").astype(np.int64)
+    lengths = [hi - lo for lo, hi in store.offsets.values()]
+    block = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+    # A gap wider than any window between consecutive artists
+    return block * (days.max() - days.min() + 1000) + (days - days.min())
+
+
+def rolling_mean(keys, values, days):
+    """
+    Mean of each artist's values over the ``days`` calendar days ending on each row.
+
+    Missing days and NaNs are skipped, so the mean is over the days observed.
+    Rows with nothing observed in their window are NaN.
+    """
+    lo = np.searchsorted(keys, keys - (days - 1), "left")
+    observed = ~np.isnan(values)
+    sums = np.concatenate([[0.0], np.cumsum(np.where(observed, values, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(observed)])
+    idx = np.arange(len(values)) + 1
+    n = counts[idx] - counts[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 0, (sums[idx] - sums[lo]) / n, np.nan)
+
+
+def growth(keys, values, days):
+    """Percent change from the same artist's value ``days`` calendar days earlier (NaN if unobserved)."""
+    prev = np.searchsorted(keys, keys - days, "left")
+    prev = np.minimum(prev, len(keys) - 1)
+    found = keys[prev] == keys - days
+    with np.errstate(invalid="ignore", divide="ignore"):
+        change = (values / values[prev] - 1) * 100
+    return np.where(found & (values[prev] != 0), change, np.nan)
+
+
+def add_derived_metrics(store):
+    """
+    Add rolling means and growth rates of every metric to an ArtistStore.
+
+    New metrics are named like "Playlist Reach (7-day avg)" and appended to
+    ``store.metrics`` after the raw ones.
+    """
+    if not len(store):
+        return store
+    keys = _day_keys(store)
+    for metric in list(store.metrics):
+        values = store.values[metric]
+        for label, days in ROLLING_DAYS.items():
+            _add(store, f"{metric} ({label})", rolling_mean(keys, values, days))
+        for label, days in GROWTH_DAYS.items():
+            _add(store, f"{metric} ({label})", growth(keys, values, days))
+    return store
+
+
+def _add(store, name, values):
+    store.values[name] = values
+    store.metrics.append(name)
+
+
+def index_to(store, selection, metric, reference_date):
+    """
+    Rescale each selected series so its value on ``reference_date`` is 100.
+
+    Like ``normalize`` in the scdense scripts, a series with no value on
+    that date is left as it is.
+
+    Args:
+        store (ArtistStore): The store the selection came from.
+        selection (dict): Artist -> (dates, values), from ``store.select``.
+        metric (str): The selected metric.
+        reference_date (date): The date that becomes 100.
+
+    Returns:
+        dict: Artist -> (dates, values), with new value arrays.
+    """
+    indexed = {}
+    for artist, (dates, values) in selection.items():
+        _, ref = store.series(artist, metric, reference_date, reference_date)
+        if len(ref) and np.isfinite(ref[0]) and ref[0] != 0:
+            values = values / ref[0] * 100
+        indexed[artist] = (dates, values)
+    return indexed
@@ -0,0 +1,119 @@
+import numpy as np
+
+# Roughly the width in pixels of the plot in the wide layout. There is no point
+# sending the browser more points per line than it has pixels to draw them on.
+
+MAX_POINTS = 1500
+
+
+def _as_float(x):
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept. The points in between are split
+    into ``n_out - 2`` buckets and, from each bucket, the point forming the
+    largest triangle with the previously kept point and the mean of the next
+    bucket is kept. This preserves the visual shape of the line.
+
+    Args:
+        x (np.ndarray): Sorted x values (numbers or datetime64).
+        y (np.ndarray): y values without NaNs.
+        n_out (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted indices of the kept points.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    xf, yf = _as_float(x), y.astype(float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo = hi
+        nhi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = xf[nlo:nhi].mean(), yf[nlo:nhi].mean()
+        area = np.abs(
+            (xf[a] - avg_x) * (yf[lo:hi] - yf[a])
+            - (xf[a] - xf[lo:hi]) * (avg_y - yf[a])
+        )
+        a = lo + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def minmax(x, y, n_out):
+    """
+    Min/max bucketing: keep the lowest and highest point of each bucket.
+
+    Cheaper than LTTB and guarantees every spike survives, at the cost of a
+    more jagged line.
+
+    Args:
+        x (np.ndarray): Sorted x values.
+        y (np.ndarray): y values without NaNs.
+        n_out (int): Approximate number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted indices of the kept points.
+    """
+    n = len(x)
+    buckets = n_out // 2
+    if n_out >= n or buckets < 1:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    kept = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        chunk = y[lo:hi]
+        kept.append(lo + int(np.argmin(chunk)))
+        kept.append(lo + int(np.argmax(chunk)))
+    return np.unique(kept)
+
+
+METHODS = {"LTTB": lttb, "Min/max": minmax}
+
+
+def downsample(x, y, method="LTTB", max_points=MAX_POINTS):
+    """
+    Reduce a series to about ``max_points`` points for plotting.
+
+    Series already short enough are returned unchanged. Kept points are
+    original observations, so hover values stay exact. Missing values are
+    skipped when choosing points, and a NaN point is put back wherever the
+    original series has a gap between two kept points, so the line breaks
+    there as it does unthinned.
+
+    Args:
+        x (np.ndarray): Sorted x values.
+        y (np.ndarray): y values.
+        method (str): "LTTB", "Min/max", or "Off".
+        max_points (int): Points to keep per series.
+
+    Returns:
+        tuple: (x, y) of the kept points.
+    """
+    if method not in METHODS or len(x) <= max_points:
+        return x, y
+    valid = ~np.isnan(y)
+    positions = np.flatnonzero(valid)
+    kept = positions[METHODS[method](x[valid], y[valid], max_points)]
+
+    # A gap lies between consecutive kept points when NaNs were skipped there;
+    # its first missing observation becomes the break
+    missing = np.cumsum(~valid)
+    gaps = np.flatnonzero(missing[kept[1:]] > missing[kept[:-1]])
+    if not len(gaps):
+        return x[kept], y[kept]
+    nans = np.flatnonzero(~valid)
+    breaks = nans[np.searchsorted(nans, kept[gaps])]
+    order = np.argsort(np.concatenate([kept, breaks]), kind="stable")
+    return np.concatenate([x[kept], x[breaks]])[order], np.concatenate([y[kept], y[breaks]])[order]
@@ -0,0 +1,341 @@
+"""
+Load test for the artist dashboard.
+
+Simulated viewers drive spotifydash.py through Streamlit's AppTest runner.
+Every session runs in its own worker process, so the sessions of a level
+really run at the same time; AppTest is not safe to drive from several
+threads of one process. All workers read from a local HTTP stand-in for
+raw.githubusercontent.com (and the api.github.com commits endpoint), filled
+with synthetic artists, and share one snapshot directory. Workers import
+Streamlit first and then start their sessions together, so start-up is not
+counted. Any session error fails the run, so a comparison is never made from
+runs in which sessions crashed.
+
+For every concurrency level the harness reports p50/p95/p99 interaction
+latency, throughput, and CPU time and resident memory per session, and it can
+compare a run against a stored baseline:
+
+    python Python/dash/loadtest.py --levels 1 5 10 25 --output after.json
+    python Python/dash/loadtest.py --levels 1 5 10 25 --baseline after.json
+
+CPU and memory are those of the worker processes: ``rss_mb_per_session`` is
+what a worker's resident memory grows by while its session runs, and
+``rss_mb_total`` is the resident memory of all of a level's workers at the end.
+Each worker holds its own copy of the app's caches, as one server process per
+viewer would, so one worker per session is the upper bound on memory.
+
+Requires streamlit>=1.37 and psutil.
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import numpy as np
+import pandas as pd
+import psutil
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "spotifydash.py")
+
+PATHS = {
+    "Spotify": ("Spotify/Merged_Spotify_Data.csv", "Playlist Reach"),
+    "Apple Music": ("Apple Music/AppleMusic.csv", "Playlists"),
+}
+
+
+def make_dataset(directory, n_artists=200, n_days=1500, seed=0):
+    """
+    Write synthetic Spotify and Apple Music CSVs laid out like the repository.
+
+    Args:
+        directory (str): Root directory for the files.
+        n_artists (int): Number of artists, "Tyla" included.
+        n_days (int): Days of data per artist.
+        seed (int): Random seed.
+    """
+    rng = np.random.default_rng(seed)
+    artists = ["Tyla"] + [f"Artist {i:04d}" for i in range(1, n_artists)]
+    dates = pd.date_range("2020-01-01", periods=n_days).strftime("%Y-%m-%d 00:00:00")
+    for path, outcome in PATHS.values():
+        n = n_artists * n_days
+        walk = np.abs(rng.normal(0, 1, (n_artists, n_days)).cumsum(axis=1)) * 1e3
+        df = pd.DataFrame(
+            {
+                "Artist": np.repeat(artists, n_days),
+                "Date": np.tile(dates, n_artists),
+                outcome: walk.ravel().round(),
+                "Followers": rng.integers(0, 10**6, n),
+            }
+        )
+        os.makedirs(os.path.dirname(os.path.join(directory, path)), exist_ok=True)
+        df.to_csv(os.path.join(directory, path), index=False)
+
+
+class StandIn(ThreadingHTTPServer):
+    """
+    Local stand-in for raw.githubusercontent.com and the GitHub commits API.
+
+    Files under ``directory`` are served with an ETag and answer a matching
+    If-None-Match with 304. ``/repos/<owner>/<repo>/commits?path=<file>``
+    returns the file's ETag as the latest commit SHA.
+
+    Args:
+        directory (str): Root directory of the served files.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, directory):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.directory = directory
+        self.hits = {"raw": 0, "not_modified": 0, "api": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def count(self, kind):
+        with self._lock:
+            self.hits[kind] += 1
+
+    def etag(self, path):
+        stat = os.stat(os.path.join(self.directory, path))
+        key = f"{path}:{stat.st_mtime_ns}:{stat.st_size}".encode()
+        return '"' + hashlib.sha1(key).hexdigest() + '"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.startswith("/repos/"):
+            self.server.count("api")
+            path = parse_qs(url.query).get("path", [""])[0]
+            if not os.path.exists(os.path.join(self.server.directory, path)):
+                return self._send(404)
+            sha = self.server.etag(path).strip('"')
+            return self._send(
+                200, json.dumps([{"sha": sha}]).encode(), {"Content-Type": "application/json"}
+            )
+        path = unquote(url.path.lstrip("/"))
+        full = os.path.join(self.server.directory, path)
+        if not os.path.isfile(full):
+            return self._send(404)
+        etag = self.server.etag(path)
+        if self.headers.get("If-None-Match") == etag:
+            self.server.count("not_modified")
+            return self._send(304, headers={"ETag": etag})
+        self.server.count("raw")
+        with open(full, "rb") as f:
+            self._send(200, f.read(), {"ETag": etag, "Content-Type": "text/plain"})
+
+
+def _interact(at, rng, bounds):
+    """Apply one random sidebar interaction and rerun the app."""
+    sidebar = at.sidebar
+    action = rng.integers(4)
+    if action == 0:
+        artists = sidebar.multiselect[0]
+        if len(artists.value) >= 4:
+            artists.unselect(artists.value[0])
+        else:
+            artists.select(artists.options[rng.integers(len(artists.options))])
+    elif action == 1:
+        metrics = sidebar.radio[1]
+        metrics.set_value(metrics.options[rng.integers(len(metrics.options))])
+    elif action == 2:
+        dates = sidebar.slider[0]
+        lo, hi = bounds
+        span = (hi - lo).days
+        start = lo + timedelta(days=int(rng.integers(span)))
+        end = start + timedelta(days=int(rng.integers(1, span + 1)))
+        dates.set_range(start, min(end, hi))
+    else:
+        downsampling = sidebar.selectbox[0]
+        downsampling.select(downsampling.options[rng.integers(len(downsampling.options))])
+    at.run()
+
+
+def _session(seed, interactions, timeout, ready, results):
+    """One viewer, in its own worker process; puts its measurements on ``results``."""
+    from streamlit.testing.v1 import AppTest
+
+    process = psutil.Process()
+    rng = np.random.default_rng(seed)
+    latencies, errors = [], []
+    rss_before = process.memory_info().rss
+    ready.wait(timeout)
+    cpu_before = process.cpu_times()
+    began = time.time()
+    try:
+        start = time.perf_counter()
+        at = AppTest.from_file(APP, default_timeout=timeout).run()
+        latencies.append(time.perf_counter() - start)
+        if at.exception:
+            errors.append(at.exception[0].message)
+        else:
+
+            # The date slider starts out spanning the whole dataset
+
+            bounds = at.sidebar.slider[0].value
+            for _ in range(interactions):
+                start = time.perf_counter()
+                _interact(at, rng, bounds)
+                latencies.append(time.perf_counter() - start)
+                if at.exception:
+                    errors.append(at.exception[0].message)
+    except Exception as exc:
+        errors.append(repr(exc))
+    cpu_after = process.cpu_times()
+    results.put({
+        "latencies": latencies,
+        "errors": errors,
+        "began": began,
+        "ended": time.time(),
+        "cpu": (cpu_after.user + cpu_after.system) - (cpu_before.user + cpu_before.system),
+        "rss_grown": process.memory_info().rss - rss_before,
+        "rss": process.memory_info().rss,
+    })
+
+
+def run_level(sessions, interactions, timeout=120):
+    """
+    Run ``sessions`` simulated viewers at once, one worker process each.
+
+    Args:
+        sessions (int): Concurrent sessions.
+        interactions (int): Interactions per session after the first load.
+        timeout (float): Seconds allowed for one rerun.
+
+    Returns:
+        dict: Latency percentiles (ms), throughput, CPU and memory per session.
+    """
+    context = multiprocessing.get_context("spawn")
+    ready = context.Barrier(sessions)
+    results = context.Queue()
+    workers = [
+        context.Process(target=_session, args=(seed, interactions, timeout, ready, results))
+        for seed in range(sessions)
+    ]
+    for worker in workers:
+        worker.start()
+    # A worker that dies (an import error, say) sends nothing, so stop waiting
+    # once every worker has exited
+
+    done = []
+    while len(done) < sessions:
+        try:
+            done.append(results.get(timeout=1))
+        except queue.Empty:
+            if not any(worker.is_alive() for worker in workers):
+                break
+    for worker in workers:
+        worker.join(timeout=10)
+        if worker.is_alive():
+            worker.terminate()
+    errors = [error for session in done for error in session["errors"]]
+    errors += ["worker exited without results"] * (sessions - len(done))
+    latencies = [latency for session in done for latency in session["latencies"]]
+    elapsed = max(s["ended"] for s in done) - min(s["began"] for s in done) if done else 0
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1e3 if latencies else (0, 0, 0)
+    return {
+        "sessions": sessions,
+        "interactions": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "p50_ms": round(float(p50), 1),
+        "p95_ms": round(float(p95), 1),
+        "p99_ms": round(float(p99), 1),
+        "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0,
+        "cpu_s_per_session": round(sum(s["cpu"] for s in done) / sessions, 3),
+        "rss_mb_per_session": round(sum(s["rss_grown"] for s in done) / 2**20 / sessions, 2),
+        "rss_mb_total": round(sum(s["rss"] for s in done) / 2**20, 1),
+    }
+
+
+COLUMNS = [
+    "p50_ms", "p95_ms", "p99_ms", "throughput_per_s", "cpu_s_per_session", "rss_mb_per_session", "rss_mb_total",
+]
+
+
+def report(results, baseline=None):
+    """Print one row per concurrency level, with the change against a baseline."""
+    old = {row["sessions"]: row for row in (baseline or {}).get("levels", [])}
+    print(f"{'sessions':>8} " + " ".join(f"{col:>22}" for col in COLUMNS) + f" {'errors':>6}")
+    for row in results["levels"]:
+        cells = []
+        for col in COLUMNS:
+            cell = f"{row[col]}"
+            prev = old.get(row["sessions"], {}).get(col)
+            if prev:
+                cell += f" ({(row[col] - prev) / prev:+.0%})"
+            cells.append(f"{cell:>22}")
+        print(f"{row['sessions']:>8} " + " ".join(cells) + f" {row['errors']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 5, 10, 25])
+    parser.add_argument("--interactions", type=int, default=20)
+    parser.add_argument("--artists", type=int, default=200)
+    parser.add_argument("--days", type=int, default=1500)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare against results from an earlier run.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data_dir = os.path.join(workdir, "data")
+        make_dataset(data_dir, args.artists, args.days)
+        server = StandIn(data_dir)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        # The workers inherit these; the app reads them when AppTest first runs it
+
+        os.environ["DASH_RAW_URL"] = server.url
+        os.environ["DASH_SNAPSHOT_DIR"] = os.path.join(workdir, "snapshots")
+        os.environ.pop("DASH_DATA_DIR", None)
+
+        results = {
+            "config": vars(args),
+            "levels": [run_level(n, args.interactions) for n in args.levels],
+        }
+        results["stand_in_requests"] = dict(server.hits)
+        server.shutdown()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report(results, baseline)
+    failed = [row for row in results["levels"] if row["errors"]]
+    if failed:
+        for row in failed:
+            print(f"{row['sessions']} sessions: {row['errors']} errors, first: {row['first_error']}")
+        raise SystemExit("Sessions failed; the results are not written or comparable.")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+import argparse
+import hashlib
+import os
+import re
+from datetime import date
+
+import pandas as pd
+
+# Append-only, date-partitioned Parquet storage for the scraped series.
+#
+# Each day's scrape is written as its own small file, <directory>/YYYY-MM-DD.parquet,
+# so adding a day never rewrites what is already stored. compact() folds the day
+# files of finished months into one YYYY-MM.parquet each. Every file holds typed
+# columns: Artist as a categorical (dictionary-encoded in Parquet), Date as a
+# datetime and each metric as float64. read() opens only the files whose dates
+# overlap the requested range and keeps only the requested artists as it reads.
+# No two files hold the same date, so the directory can also be read as it is,
+# e.g. with pd.read_parquet. The CSV stays available through export_csv.
+#
+#   python Python/dash/partitions.py import "Apple Music/AppleMusic.csv" "Apple Music/partitions"
+#   python Python/dash/partitions.py append "Apple Music/partitions" today.csv
+#   python Python/dash/partitions.py compact "Apple Music/partitions"
+#   python Python/dash/partitions.py export "Apple Music/partitions" "Apple Music/AppleMusic.csv"
+
+DAY_FILE = re.compile(r"^(\d{4}-\d{2}-\d{2})\.parquet$")
+MONTH_FILE = re.compile(r"^(\d{4}-\d{2})\.parquet$")
+
+
+def typed(data):
+    """
+    Give a scraped frame the stored column types.
+
+    Dates may carry a time of day ("2024-01-01 00:00:00"); it is dropped.
+    Rows without an artist or a parseable date are dropped too, since they
+    cannot be placed in a partition.
+
+    Args:
+        data (pd.DataFrame): Data with ``Artist`` and ``Date`` columns; every
+            other column is treated as a metric.
+
+    Returns:
+        pd.DataFrame: Artist (category), Date (datetime64), metrics (float64).
+    """
+    dates = pd.to_datetime(data["Date"], format="ISO8601", errors="coerce").dt.normalize()
+    keep = data["Artist"].notna() & dates.notna()
+    out = pd.DataFrame({
+        "Artist": data.loc[keep, "Artist"].astype(str),
+        "Date": dates[keep].astype("datetime64[ns]"),
+    })
+    for col in data.columns:
+        if col not in ("Artist", "Date"):
+            out[col] = pd.to_numeric(data.loc[keep, col], errors="coerce").astype("float64")
+    out["Artist"] = _sorted_categories(out["Artist"])
+    return out.reset_index(drop=True)
+
+
+def _sorted_categories(artists):
+    """A categorical with its categories in sorted order, so sorting by code sorts by name."""
+    values = artists.astype(str)
+    return pd.Categorical(values, categories=sorted(values.unique()))
+
+
+def _latest(frames):
+    """Concatenate, keeping the last row seen for each (Artist, Date)."""
+    data = pd.concat([frame.astype({"Artist": str}) for frame in frames], ignore_index=True)
+    data = data.drop_duplicates(["Artist", "Date"], keep="last")
+    data["Artist"] = _sorted_categories(data["Artist"])
+    return data.sort_values(["Artist", "Date"], kind="stable").reset_index(drop=True)
+
+
+class PartitionedSeries:
+    """
+    One platform's series as a directory of date-partitioned Parquet files.
+
+    Args:
+        directory (str): Directory holding the partitions; created if missing.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def partitions(self):
+        """
+        The stored files in date order.
+
+        Returns:
+            list: (first date, last date, path) per file.
+        """
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if day := DAY_FILE.match(name):
+                first = last = pd.Timestamp(day.group(1))
+                found.append((first, last, path))
+            elif month := MONTH_FILE.match(name):
+                first = pd.Timestamp(month.group(1) + "-01")
+                found.append((first, first + pd.offsets.MonthEnd(0), path))
+        return sorted(found)
+
+    def version(self):
+        """
+        A tag that changes whenever a partition is written or removed.
+
+        Returns:
+            str: Hash of the file names, sizes and modification times.
+        """
+        digest = hashlib.sha1()
+        for _, _, path in self.partitions():
+            stat = os.stat(path)
+            digest.update(f"{os.path.basename(path)}:{stat.st_mtime_ns}:{stat.st_size};".encode())
+        return digest.hexdigest()
+
+    def _write(self, data, name):
+        # Readers skip dot files, so a partial file is never read
+        path = os.path.join(self.directory, name)
+        tmp = os.path.join(self.directory, "." + name + ".tmp")
+        data.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        return path
+
+    def append(self, data):
+        """
+        Store a scrape, one day file per date in it.
+
+        Stored rows are never rewritten, except that a day that already has a
+        file is merged with it, the new rows winning, so scraping a day twice
+        is harmless. A day whose month has been compacted is merged into the
+        month file, so no two files ever hold the same date.
+
+        Args:
+            data (pd.DataFrame): Scraped rows, with ``Artist``, ``Date`` and
+                metric columns.
+
+        Returns:
+            list: Paths of the files written.
+        """
+        written = []
+        for day, rows in typed(data).groupby("Date", sort=True):
+            name = f"{day:%Y-%m-%d}.parquet"
+            if os.path.exists(os.path.join(self.directory, f"{day:%Y-%m}.parquet")):
+                name = f"{day:%Y-%m}.parquet"
+            path = os.path.join(self.directory, name)
+            if os.path.exists(path):
+                rows = _latest([pd.read_parquet(path), rows])
+            else:
+                rows = _latest([rows])
+            written.append(self._write(rows, name))
+        return written
+
+    def backfill(self, data):
+        """
+        Store many days at once, such as an existing CSV.
+
+        Finished months go straight into month files, merged with what is
+        already stored for them; the newest month stored is appended as day
+        files, as if it had been scraped day by day.
+
+        Args:
+            data (pd.DataFrame): Rows with ``Artist``, ``Date`` and metric columns.
+
+        Returns:
+            list: Paths of the files written.
+        """
+        data = typed(data)
+        if data.empty:
+            return []
+        months = data["Date"].dt.strftime("%Y-%m")
+        stored = {}
+        for first, _, path in self.partitions():
+            stored.setdefault(f"{first:%Y-%m}", []).append(path)
+        newest = max([months.max(), *stored])
+        written = []
+        for month, rows in data[months < newest].groupby(months[months < newest], sort=True):
+            paths = stored.get(month, [])
+            written.append(self._write(_latest([pd.read_parquet(path) for path in paths] + [rows]), month + ".parquet"))
+            for path in paths:
+                if DAY_FILE.match(os.path.basename(path)):
+                    os.remove(path)
+        return written + self.append(data[months == newest])
+
+    def compact(self, before=None):
+        """
+        Fold the day files of each finished month into one month file.
+
+        Args:
+            before (date): Compact months that end before this date. Defaults
+                to the first day of the month of the newest stored date, so
+                the month still being scraped keeps its day files.
+
+        Returns:
+            list: The months compacted, as "YYYY-MM".
+        """
+        parts = self.partitions()
+        if not parts:
+            return []
+        if before is None:
+            before = parts[-1][1].replace(day=1)
+        before = pd.Timestamp(before)
+
+        months = {}
+        for first, last, path in parts:
+            if last < before:
+                months.setdefault(f"{first:%Y-%m}", []).append(path)
+        compacted = []
+        for month, paths in sorted(months.items()):
+            days = [path for path in paths if DAY_FILE.match(os.path.basename(path))]
+            if not days:
+                continue
+            self._write(_latest([pd.read_parquet(path) for path in paths]), month + ".parquet")
+            for path in days:
+                os.remove(path)
+            compacted.append(month)
+        return compacted
+
+    def read(self, start=None, end=None, artists=None):
+        """
+        Load the stored rows between two dates, for some or all artists.
+
+        Args:
+            start (date): First date to include. None reads from the start.
+            end (date): Last date to include. None reads to the end.
+            artists (list): Artists to include. None reads every artist.
+
+        Returns:
+            pd.DataFrame: Rows sorted by artist and date, with Artist a
+            categorical whose categories are in sorted order.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        paths = [
+            path for first, last, path in self.partitions()
+            if (start is None or last >= start) and (end is None or first <= end)
+        ]
+        if not paths:
+            return typed(pd.DataFrame({"Artist": [], "Date": []}))
+
+        # One scan over every file; a metric missing from older files reads as null
+        schema = pa.unify_schemas([pq.read_schema(path).remove_metadata() for path in paths])
+        condition = ds.scalar(True)
+        if start is not None:
+            condition &= ds.field("Date") >= pa.scalar(start, schema.field("Date").type)
+        if end is not None:
+            condition &= ds.field("Date") <= pa.scalar(end, schema.field("Date").type)
+        if artists is not None:
+            condition &= ds.field("Artist").isin(list(artists))
+        data = ds.dataset(paths, schema=schema, format="parquet").to_table(filter=condition).to_pandas()
+        data["Artist"] = data["Artist"].cat.remove_unused_categories()
+        data["Artist"] = data["Artist"].cat.reorder_categories(sorted(data["Artist"].cat.categories))
+        metrics = [col for col in data.columns if col not in ("Artist", "Date")]
+        data[metrics] = data[metrics].astype("float64")
+        return data.sort_values(["Artist", "Date"], kind="stable").reset_index(drop=True)
+
+    def export_csv(self, path, **kwargs):
+        """
+        Write the stored rows as one CSV, laid out like the scraped files.
+
+        Args:
+            path (str): CSV file to write.
+            **kwargs: Passed on to ``read``.
+
+        Returns:
+            str: ``path``.
+        """
+        data = self.read(**kwargs)
+        data["Date"] = data["Date"].dt.strftime("%Y-%m-%d")
+        tmp = path + ".tmp"
+        # Whole counts are written without a trailing ".0", as scraped
+        data.to_csv(tmp, index=False, float_format="%.15g")
+        os.replace(tmp, path)
+        return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Date-partitioned Parquet storage for the scraped series.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    imported = commands.add_parser("import", help="Partition an existing CSV.")
+    imported.add_argument("csv")
+    imported.add_argument("directory")
+    appended = commands.add_parser("append", help="Add a scrape, one day file per date.")
+    appended.add_argument("directory")
+    appended.add_argument("csv")
+    compacted = commands.add_parser("compact", help="Fold finished months into month files.")
+    compacted.add_argument("directory")
+    compacted.add_argument("--before", type=date.fromisoformat)
+    exported = commands.add_parser("export", help="Write the stored rows as one CSV.")
+    exported.add_argument("directory")
+    exported.add_argument("csv")
+    exported.add_argument("--start", type=date.fromisoformat)
+    exported.add_argument("--end", type=date.fromisoformat)
+    args = parser.parse_args()
+
+    store = PartitionedSeries(args.directory)
+    if args.command == "import":
+        print(f"{len(store.backfill(pd.read_csv(args.csv)))} files written")
+    elif args.command == "append":
+        print(f"{len(store.append(pd.read_csv(args.csv)))} files written")
+    elif args.command == "compact":
+        print(f"{len(store.compact(args.before))} months compacted")
+    elif args.command == "export":
+        store.export_csv(args.csv, start=args.start, end=args.end)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,54 +1,54 @@
-import pandas as pd
-import requests
+import numpy as np
 import streamlit as st
 import plotly.graph_objects as go
-import time
+
+from artiststore import ArtistStore
+from datasource import Snapshot, StaleSnapshot, make_source
+from derived import add_derived_metrics, index_to
+from downsample import MAX_POINTS, downsample
 
 st.set_page_config(layout="wide", page_title="Artist Trends")
 
+# How often each session checks whether the snapshot has a new version
+
+REFRESH_CHECK_SECONDS = 30
+
 # Display a general message at the top
 
 st.markdown(
     "## I'm a music nerd. Especially for (neo)soul and alt-R/B music. I'm also a fan of the [COLORS](https://www.youtube.com/@COLORSxSTUDIOS) show on YouTube. In this spirit, I scraped some data from Spotify and Apple Music. The data are for lots of my favorite neo-soul artists, or other artists from generes I like. I made an app of it."
 )
 
-# Function to get the latest commit SHA for versioning
+# One snapshot per platform and process. Its background thread revalidates the
+# CSV against GitHub, so a rerun never waits on the network.
 
 
-def get_csv_version(platform):
-    if platform == "Spotify":
-        url = (
-            r"https://api.github.com/repos/jgreathouse9/jgreathouse9.github.io/commits"
-            r"?path=Spotify/Merged_Spotify_Data.csv&page=1&per_page=1"
-        )
-    else:  # Apple Music
-        url = (
-            r"https://api.github.com/repos/jgreathouse9/jgreathouse9.github.io/commits"
-            r"?path=Apple%20Music/AppleMusic.csv&page=1&per_page=1"
-        )
-    response = requests.get(url)
-    if response.status_code == 200:
-        commit_data = response.json()
-        return commit_data[0]["sha"]  # Use the latest commit SHA as the version key
-    else:
-        st.error("Unable to fetch file version. Using default cache key.")
-        return "default_version"
+@st.cache_resource
+def get_snapshot(platform):
+    snapshot = Snapshot(platform, make_source(platform))
+    try:
+        snapshot.refresh()
+    except OSError as exc:
+        print(f"Initial download of the {platform} data failed: {exc}")
+    snapshot.start()
+    return snapshot
 
 
-# Function to load the appropriate data based on the selected platform
+# The data of each version, indexed by artist with its derived metrics, held once
+# per process and shared by every session and rerun. st.cache_resource hands out
+# the same object instead of a copy, so the store is frozen (read-only arrays).
+# A new snapshot version is a new key: sessions move to it on their next rerun,
+# and old versions are evicted once more than two per platform are cached.
+# The data and its version are read together; if the snapshot has moved on
+# since ``version`` was looked up, nothing is cached under the old key.
 
 
-@st.cache_data
-def load_data(platform, version):
-    if platform == "Spotify":
-        file_path = r"https://raw.githubusercontent.com/jgreathouse9/jgreathouse9.github.io/refs/heads/master/Spotify/Merged_Spotify_Data.csv"
-    else:  # Apple Music
-        file_path = r"https://raw.githubusercontent.com/jgreathouse9/jgreathouse9.github.io/refs/heads/master/Apple%20Music/AppleMusic.csv"
-    data = pd.read_csv(file_path)
-    data["Date"] = pd.to_datetime(
-        data["Date"].str.split(" ").str[0], format="%Y-%m-%d", errors="coerce"
-    )
-    return data
+@st.cache_resource(max_entries=4)
+def load_store(platform, version):
+    data_version, data = get_snapshot(platform).read_versioned()
+    if data_version != version:
+        raise StaleSnapshot(f"{platform} moved from {version} to {data_version}")
+    return add_derived_metrics(ArtistStore(data)).freeze()
 
 
 # Platform selection
@@ -59,17 +59,23 @@ platform = st.sidebar.radio(
     index=0,  # Default to Spotify
 )
 
-# Fetch CSV version key based on platform
+# The snapshot's ETag is the cache key, so new data is picked up on the next rerun
 
-csv_version = get_csv_version(platform)
+snapshot = get_snapshot(platform)
+if snapshot.version is None:
+    st.error("Unable to fetch the data. Please try again later.")
+    st.stop()
 
 # Load the appropriate data based on the selected platform
 
-data = load_data(platform=platform, version=csv_version)
+try:
+    store = load_store(platform=platform, version=snapshot.version)
+except StaleSnapshot:
+    st.rerun()
 
 # Artist Selection in the sidebar
 
-artist_list = sorted(data["Artist"].unique())
+artist_list = store.artists
 default_artist = "Tyla" if "Tyla" in artist_list else artist_list[0]
 selected_artists = st.sidebar.multiselect(
     "Choose artists", artist_list, default=[default_artist]
@@ -79,7 +85,7 @@ selected_artists = st.sidebar.multiselect(
 
 metric = st.sidebar.radio(
     "Choose a metric to plot:",
-    options=[col for col in data.columns if col not in ["Artist", "Date"]],
+    options=store.metrics,
 )
 
 # Date Range Selector in the sidebar
@@ -87,20 +93,38 @@ metric = st.sidebar.radio(
 st.sidebar.header("Date Range Selection")
 date_slider = st.sidebar.slider(
     "Select date range:",
-    min_value=data["Date"].min().date(),
-    max_value=data["Date"].max().date(),
-    value=(data["Date"].min().date(), data["Date"].max().date()),
+    min_value=store.min_date,
+    max_value=store.max_date,
+    value=(store.min_date, store.max_date),
     format="YYYY-MM-DD",
 )
 start_date, end_date = date_slider
 
+# Long series are thinned on the server before they are sent to the browser.
+# Narrowing the date range brings back full resolution.
+
+downsampling = st.sidebar.selectbox(
+    "Downsample long series", options=["LTTB", "Min/max", "Off"], index=0
+)
+
+# Optionally index every line to 100 on a reference date, like the scdense posts
+
+index_lines = st.sidebar.checkbox("Index to a reference date (= 100)?", value=False)
+if index_lines:
+    reference_date = st.sidebar.slider(
+        "Reference date",
+        min_value=store.min_date,
+        max_value=store.max_date,
+        value=store.min_date,
+        format="YYYY-MM-DD",
+    )
+
 # Filter the data based on the selected artist and date range
 
-filtered_data = data[
-    (data["Artist"].isin(selected_artists))
-    & (data["Date"] >= pd.to_datetime(start_date))
-    & (data["Date"] <= pd.to_datetime(end_date))
-].sort_values(by="Date")
+selection = store.select(selected_artists, metric, start_date, end_date)
+if index_lines:
+    selection = index_to(store, selection, metric, reference_date)
+selected_values = [values for _, values in selection.values() if len(values)]
 
 # X-axis Reference line for the date (added option to show or hide)
 
@@ -109,24 +133,27 @@ vertical_line_date = None
 if show_vertical_line:
     vertical_line_date = st.sidebar.slider(
         "Select date for vertical reference line",
-        min_value=data["Date"].min().date(),
-        max_value=data["Date"].max().date(),
-        value=data["Date"].min().date(),
+        min_value=store.min_date,
+        max_value=store.max_date,
+        value=store.min_date,
         format="YYYY-MM-DD",
     )
 # Check if any data is available after filtering
 
-if filtered_data.empty:
+if not selected_values:
     st.write("No data available for the selected date range.")
 else:
     # Create the plot
 
     fig = go.Figure()
+    thinned = []
 
     for artist in selected_artists:
-        artist_data = filtered_data[filtered_data["Artist"] == artist]
-        dates = artist_data["Date"]
-        metric_values = artist_data[metric]
+        dates, metric_values = selection.get(artist, ([], []))
+        full_length = len(dates)
+        dates, metric_values = downsample(dates, metric_values, method=downsampling)
+        if len(dates) < full_length:
+            thinned.append(artist)
 
         # Add a line for each artist
 
@@ -157,8 +184,8 @@ else:
             type="line",
             x0=vertical_line_date,
             x1=vertical_line_date,
-            y0=filtered_data[metric].min(),
-            y1=filtered_data[metric].max(),
+            y0=min(np.nanmin(values) for values in selected_values),
+            y1=max(np.nanmax(values) for values in selected_values),
             line=dict(color="blue", dash="dot"),
         )
     # Set title and labels
@@ -176,16 +203,22 @@ else:
     # Show the plot in Streamlit
 
     st.plotly_chart(fig)
-# Use st.empty() to refresh periodically
+    if thinned:
+        st.caption(
+            f"Showing about {MAX_POINTS:,} points per line for {', '.join(thinned)}. "
+            "Narrow the date range to see every day."
+        )
+# Rerun once when the background refresher brings in a new version of the data.
+# The fragment only compares two strings, so an idle session costs next to nothing
+# and no server thread is held between checks.
+
+st.session_state.data_version = snapshot.version
 
-if "counter" not in st.session_state:
-    st.session_state.counter = 0  # Initialize counter if it doesn't exist
-# Increment counter every time the script reruns
 
-st.session_state.counter += 1
+@st.fragment(run_every=REFRESH_CHECK_SECONDS)
+def watch_for_new_data(platform):
+    if get_snapshot(platform).version != st.session_state.data_version:
+        st.rerun()
 
-# Wait 10 seconds before rerunning the app (without blocking the main process)
 
-if st.session_state.counter % 2 == 0:
-    time.sleep(10)  # Simulate wait before rerun
-    st.rerun()  # Trigger a rerun of the app
+watch_for_new_data(platform)
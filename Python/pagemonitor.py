@@ -0,0 +1,188 @@
+"""
+Watch a list of pages for links whose text matches given patterns.
+
+Every page in the watchlist is fetched concurrently through one pooled HTTP
+client. Pages that answer 304 to If-None-Match / If-Modified-Since are
+skipped, and the rest are scanned for anchors as they stream in, without
+building a parse tree. Links already reported on an earlier run are
+remembered in a state file, so each run lists only what is new. The state
+also records each page's patterns; a page whose patterns have changed is
+fetched in full, so new patterns are checked even if the page has not.
+
+    python Python/pagemonitor.py Python/watchlist.json
+
+The exit code is 1 when something new is linked, so a scheduled GitHub
+Actions run fails and sends its notification email.
+"""
+
+import argparse
+import asyncio
+import codecs
+import json
+import os
+import sys
+from html.parser import HTMLParser
+
+import aiohttp
+
+STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".pagemonitor.json")
+
+
+class AnchorScanner(HTMLParser):
+    """
+    Collect (text, href) for anchors whose text contains one of ``patterns``.
+
+    Fed incrementally, it keeps only the text of the anchor currently open.
+
+    Args:
+        patterns (list): Substrings to look for in link text.
+    """
+
+    def __init__(self, patterns):
+        super().__init__(convert_charrefs=True)
+        self.patterns = patterns
+        self.matches = []
+        self._href = None
+        self._text = None
+        self._depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "a":
+            return
+        if self._depth == 0:
+            self._href = dict(attrs).get("href")
+            self._text = []
+        self._depth += 1
+
+    def handle_data(self, data):
+        if self._depth:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag != "a" or not self._depth:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            # Patterns are matched against the raw text, as BeautifulSoup's
+            # get_text() gave it; whitespace is collapsed only for the report
+            raw = "".join(self._text)
+            for pattern in self.patterns:
+                if pattern in raw:
+                    self.matches.append({"pattern": pattern, "text": " ".join(raw.split()), "href": self._href})
+            self._text = None
+
+
+async def check(session, entry, state):
+    """
+    Fetch one watched page and return the patterns now linked on it.
+
+    Args:
+        session (aiohttp.ClientSession): Shared client.
+        entry (dict): ``{"url": ..., "patterns": [...]}``.
+        state (dict): Validators and patterns from the previous run for this URL.
+
+    Returns:
+        dict: ``status``, ``matches``, and the validators to store.
+    """
+    # The validators only say the page is unchanged, not that it was scanned
+    # for these patterns
+
+    headers = {}
+    if state.get("patterns") != sorted(entry["patterns"]):
+        state = {}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+    async with session.get(entry["url"], headers=headers) as response:
+        if response.status == 304:
+            return {"status": 304, "matches": None}
+        response.raise_for_status()
+        scanner = AnchorScanner(entry["patterns"])
+        decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(errors="replace")
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            scanner.feed(decoder.decode(chunk))
+        scanner.feed(decoder.decode(b"", final=True))
+        scanner.close()
+        return {
+            "status": response.status,
+            "matches": scanner.matches,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+
+
+async def monitor(watchlist, state, concurrency=10, timeout=30):
+    """
+    Check every page in the watchlist at once.
+
+    Args:
+        watchlist (list): Entries with ``url`` and ``patterns``.
+        state (dict): URL -> state from the previous run. Updated in place.
+        concurrency (int): Maximum open connections.
+        timeout (float): Seconds allowed per page.
+
+    Returns:
+        tuple: (new links, errors), each a list of dicts.
+    """
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        results = await asyncio.gather(
+            *(check(session, entry, state.get(entry["url"], {})) for entry in watchlist),
+            return_exceptions=True,
+        )
+
+    new, errors = [], []
+    for entry, result in zip(watchlist, results):
+        url = entry["url"]
+        if isinstance(result, Exception):
+            errors.append({"url": url, "error": repr(result)})
+            continue
+        if result["matches"] is None:
+            continue
+        previous = state.get(url, {})
+        seen = set(previous.get("seen", []))
+        for match in result["matches"]:
+            key = f"{match['pattern']}\t{match['href']}"
+            if key not in seen:
+                new.append(dict(match, url=url))
+                seen.add(key)
+        state[url] = {
+            "etag": result["etag"],
+            "last_modified": result["last_modified"],
+            "patterns": sorted(entry["patterns"]),
+            "seen": sorted(seen),
+        }
+    return new, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch pages for newly linked items.")
+    parser.add_argument("watchlist", help="JSON list of {url, patterns} entries.")
+    parser.add_argument("--state", default=STATE_PATH, help="Where to remember past runs.")
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.watchlist) as f:
+        watchlist = json.load(f)
+    state = {}
+    if os.path.exists(args.state):
+        with open(args.state) as f:
+            state = json.load(f)
+
+    new, errors = asyncio.run(monitor(watchlist, state, args.concurrency))
+
+    with open(args.state, "w") as f:
+        json.dump(state, f, indent=2)
+    for error in errors:
+        print(f"Could not check {error['url']}: {error['error']}")
+    for item in new:
+        print(f"Now linked on {item['url']}: {item['text']} -> {item['href']}")
+    if not new:
+        print("Nothing new.")
+    sys.exit(1 if new else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Tests for pagemonitor.py against a local HTTP stand-in.
+
+    python -m pytest Python/test_pagemonitor.py
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pagemonitor import AnchorScanner, monitor  # noqa: E402
+
+
+class StandIn(ThreadingHTTPServer):
+    """
+    Serves ``pages`` (path -> HTML) with an ETag, answering a matching
+    If-None-Match with 304. Paths in ``failing`` answer 500. Every request's
+    path and status are recorded in ``requests``.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.pages = {}
+        self.failing = set()
+        self.requests = []
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None):
+        self.server.requests.append((self.path, status))
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path in self.server.failing:
+            return self._send(500)
+        if self.path not in self.server.pages:
+            return self._send(404)
+        body = self.server.pages[self.path].encode()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, headers={"ETag": etag})
+        self._send(200, body, {"ETag": etag, "Content-Type": "text/html; charset=utf-8"})
+
+
+@pytest.fixture
+def server():
+    server = StandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def page(*links):
+    return "<html><body>" + "".join(f'<p><a href="{href}">{text}</a></p>' for text, href in links) + "</body></html>"
+
+
+def run(watchlist, state):
+    return asyncio.run(monitor(watchlist, state))
+
+
+def test_first_run_reports_matching_links(server):
+    server.pages["/author"] = page(("Synthetic Control, 2024", "/a.pdf"), ("CV", "/cv.pdf"))
+    watchlist = [{"url": server.url("/author"), "patterns": ["Synthetic Control"]}]
+    state = {}
+
+    new, errors = run(watchlist, state)
+
+    assert errors == []
+    assert [(item["text"], item["href"]) for item in new] == [("Synthetic Control, 2024", "/a.pdf")]
+    assert state[server.url("/author")]["etag"]
+    assert state[server.url("/author")]["patterns"] == ["Synthetic Control"]
+
+
+def test_unchanged_page_is_not_modified(server):
+    server.pages["/author"] = page(("Synthetic Control", "/a.pdf"))
+    watchlist = [{"url": server.url("/author"), "patterns": ["Synthetic Control"]}]
+    state = {}
+    run(watchlist, state)
+
+    new, errors = run(watchlist, state)
+
+    assert (new, errors) == ([], [])
+    assert server.requests == [("/author", 200), ("/author", 304)]
+
+
+def test_only_new_links_are_reported(server):
+    server.pages["/author"] = page(("Synthetic Control", "/a.pdf"))
+    watchlist = [{"url": server.url("/author"), "patterns": ["Synthetic Control"]}]
+    state = {}
+    run(watchlist, state)
+    server.pages["/author"] = page(("Synthetic Control", "/a.pdf"), ("Synthetic Control Revisited", "/b.pdf"))
+
+    new, errors = run(watchlist, state)
+
+    assert errors == []
+    assert [item["href"] for item in new] == ["/b.pdf"]
+    assert server.requests[-1] == ("/author", 200)
+
+
+def test_added_pattern_is_checked_on_an_unchanged_page(server):
+    server.pages["/author"] = page(("Synthetic Control", "/a.pdf"), ("Forward DID", "/f.pdf"))
+    state = {}
+    run([{"url": server.url("/author"), "patterns": ["Synthetic Control"]}], state)
+
+    new, errors = run([{"url": server.url("/author"), "patterns": ["Synthetic Control", "Forward DID"]}], state)
+
+    assert errors == []
+    assert [item["href"] for item in new] == ["/f.pdf"]
+    assert server.requests == [("/author", 200), ("/author", 200)]
+    assert state[server.url("/author")]["patterns"] == ["Forward DID", "Synthetic Control"]
+
+
+def test_errors_are_reported_without_stopping_other_pages(server):
+    server.pages["/author"] = page(("Synthetic Control", "/a.pdf"))
+    server.failing.add("/broken")
+    watchlist = [
+        {"url": server.url("/broken"), "patterns": ["Synthetic Control"]},
+        {"url": server.url("/missing"), "patterns": ["Synthetic Control"]},
+        {"url": server.url("/author"), "patterns": ["Synthetic Control"]},
+    ]
+    state = {}
+
+    new, errors = run(watchlist, state)
+
+    assert [item["href"] for item in new] == ["/a.pdf"]
+    assert [error["url"] for error in errors] == [server.url("/broken"), server.url("/missing")]
+    assert set(state) == {server.url("/author")}
+
+
+def test_scanner_matches_raw_text_of_nested_anchors():
+    scanner = AnchorScanner(["Control\n  Methods"])
+    scanner.feed('<a href="/x">Synthetic <b>Control\n  Methods</b></a><a href="/y">Control Methods</a>')
+    scanner.close()
+
+    assert scanner.matches == [
+        {"pattern": "Control\n  Methods", "text": "Synthetic Control Methods", "href": "/x"},
+    ]
@@ -0,0 +1,7 @@
+"""
+Timing and peak-memory benchmarks for the data-heavy paths in this repository.
+
+Inputs are synthetic and deterministic, at three scales (see ``synthetic``),
+and the cases live in ``cases``. Run them with ``python -m benchmarks`` from
+the repository root; ``run`` describes the options and the results file.
+"""
@@ -0,0 +1,379 @@
+"""
+The benchmarked paths.
+
+Each case is registered with ``@case(name)``. It receives the scale's
+parameters from ``synthetic.SCALES`` and a scratch directory, does its
+untimed setup (writing inputs, building caches), and returns the callable
+that is timed.
+"""
+
+import os
+import sys
+from datetime import timedelta
+
+import numpy as np
+
+from benchmarks import synthetic
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {}
+
+
+class Unavailable(Exception):
+    """Raised by a case lacking a dependency it cannot import itself; the suite reports it as skipped, like an ImportError."""
+
+
+def case(name):
+    def register(func):
+        CASES[name] = func
+        return func
+    return register
+
+
+def _on_path(*parts):
+    """Make a script directory importable, the way running a script from it would."""
+    path = os.path.join(REPO, *parts)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+# sqlcase.py: catalog loading and model building, then the simulator itself
+
+@case("sqlcase_model")
+def sqlcase_model(params, workdir):
+    _on_path()
+    import sqlcase
+
+    store_path, files = synthetic.write_catalog(os.path.join(workdir, "catalog"), params["stores"], params["skus"])
+
+    def run():
+        np.random.seed(sqlcase.seed)
+        stores, catalog = sqlcase.load_catalog(store_path, files)
+        sqlcase.build_model(stores, catalog, params["customers"])
+
+    return run
+
+
+@case("sqlcase_simulate")
+def sqlcase_simulate(params, workdir):
+    _on_path()
+    import sqlcase
+
+    store_path, files = synthetic.write_catalog(os.path.join(workdir, "catalog"), params["stores"], params["skus"])
+    model = sqlcase.load_or_build_model(store_path, files, params["customers"])
+    db_path = os.path.join(workdir, "sim.sqlite")
+
+    def run():
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        sqlcase.restore_rng(model)
+        sqlcase.write_sqlite(model, db_path, params["transactions"],
+                             min(sqlcase.chunk_size, params["transactions"]), progress=False)
+
+    return run
+
+
+def _stream(params, workdir, distinct):
+    _on_path()
+    import sqlcase
+
+    store_path, files = synthetic.write_catalog(os.path.join(workdir, "catalog"), params["stores"], params["skus"])
+    model = sqlcase.load_or_build_model(store_path, files, params["customers"])
+
+    def run():
+        sqlcase.restore_rng(model)
+        for transactions, line_items in sqlcase.simulate(model, params["transactions"],
+                                                         min(sqlcase.chunk_size, params["transactions"]),
+                                                         distinct=distinct):
+            np.bincount(line_items["product_idx"], weights=line_items["price"] * line_items["quantity"])
+
+    return run
+
+
+@case("sqlcase_stream")
+def sqlcase_stream(params, workdir):
+    """The simulator without a database: every chunk consumed as it is produced."""
+    return _stream(params, workdir, distinct=False)
+
+
+@case("sqlcase_stream_distinct")
+def sqlcase_stream_distinct(params, workdir):
+    """As sqlcase_stream, drawing whole baskets of distinct products (distinct_baskets = True)."""
+    return _stream(params, workdir, distinct=True)
+
+
+@case("sqlcase_startup")
+def sqlcase_startup(params, workdir):
+    """A fresh process up to its first chunk, with the model artifact and Numba cache already in place."""
+    import subprocess
+
+    store_path, files = synthetic.write_catalog(os.path.join(workdir, "catalog"), params["stores"], params["skus"])
+    artifacts = os.path.join(workdir, "artifacts")
+    script = (
+        "import sqlcase\n"
+        f"model = sqlcase.load_or_build_model({store_path!r}, {files!r}, {params['customers']}, artifact_dir={artifacts!r})\n"
+        "sqlcase.restore_rng(model)\n"
+        "sqlcase.simulate_chunk(model, 1, 1000)\n"
+    )
+    command = [sys.executable, "-c", script]
+
+    def run():
+        # A dependency the child lacks (scipy for Numba's np.dot, say) fails the
+        # child rather than this process, so only that failure is turned into a
+        # skip; any other failure of the child is an error of the case
+        result = subprocess.run(command, cwd=REPO, capture_output=True, text=True)
+        if result.returncode:
+            lines = result.stderr.strip().splitlines() or [f"exit code {result.returncode}"]
+            if lines[-1].startswith(("ModuleNotFoundError", "ImportError")):
+                raise Unavailable(f"simulator process failed: {lines[-1]}")
+            raise RuntimeError("simulator process failed:\n" + "\n".join(lines[-20:]))
+
+    run()
+    return run
+
+
+# Sqlscanner.sql: the store x day revenue panel
+
+def _retail_db(params, workdir):
+    _on_path()
+    return synthetic.write_retail_db(
+        os.path.join(workdir, "retail.sqlite"),
+        params["stores"], params["skus"], params["customers"], params["transactions"],
+    )
+
+
+@case("sqlscanner_panel")
+def sqlscanner_panel(params, workdir):
+    import sqlite3
+
+    from panelquery import read_query, sqlite_dialect
+
+    db_path = _retail_db(params, workdir)
+    query = sqlite_dialect(read_query())
+
+    def run():
+        conn = sqlite3.connect(db_path)
+        conn.execute(query).fetchall()
+        conn.close()
+
+    return run
+
+
+@case("sqlscanner_panel_duckdb")
+def sqlscanner_panel_duckdb(params, workdir):
+    """The same panel with DuckDB over a Parquet copy of the database; setup checks parity."""
+    import duckdb  # noqa: F401  (skip the case when DuckDB is missing)
+
+    from panelquery import check_parity, read_query, run_duckdb, run_sqlite, sqlite_to_parquet
+
+    db_path = _retail_db(params, workdir)
+    parquet = sqlite_to_parquet(db_path, os.path.join(workdir, "parquet"))
+    query = read_query()
+    problems = check_parity(run_sqlite(db_path, query), run_duckdb(parquet, query))
+    if problems:
+        raise AssertionError("DuckDB panel differs from SQLite: " + "; ".join(problems))
+
+    return lambda: run_duckdb(parquet, query)
+
+
+@case("sqlscanner_panel_duckdb_sqlite")
+def sqlscanner_panel_duckdb_sqlite(params, workdir):
+    """The same panel with DuckDB reading the SQLite file through its sqlite extension; setup checks parity."""
+    import duckdb
+
+    from panelquery import check_parity, read_query, run_duckdb, run_sqlite
+
+    db_path = _retail_db(params, workdir)
+    query = read_query()
+    try:
+        panel = run_duckdb(db_path, query)
+    except duckdb.IOException as e:
+        # The sqlite extension is neither installed nor downloadable here
+        raise Unavailable(str(e).splitlines()[0]) from e
+    problems = check_parity(run_sqlite(db_path, query), panel)
+    if problems:
+        raise AssertionError("DuckDB panel over SQLite differs from SQLite: " + "; ".join(problems))
+
+    return lambda: run_duckdb(db_path, query)
+
+
+# blogcontent/scdense: preprocessing and the l2 PDA fit
+
+def _scdense_input(params, workdir):
+    path = os.path.join(workdir, "artists.csv")
+    synthetic.artist_frame(params["artists"], params["days"]).to_csv(path, index=False)
+    return path
+
+
+@case("scdense_preprocess")
+def scdense_preprocess(params, workdir):
+    _on_path("blogcontent", "scdense")
+    from l2est import preprocess_data
+
+    path = _scdense_input(params, workdir)
+
+    def run():
+        preprocess_data(path, ["2023-01-01", "2024-06-01"], "Playlist Reach", "Tyla", "2023-08-17")
+
+    return run
+
+
+def _scdense_config(params, workdir):
+    _on_path("blogcontent", "scdense")
+    from l2est import preprocess_data
+
+    df = preprocess_data(_scdense_input(params, workdir), ["2023-01-01", "2024-06-01"],
+                         "Playlist Reach", "Tyla", "2023-08-17")
+    return {
+        "df": df, "treat": "Water", "time": "Date", "outcome": "Playlist Reach",
+        "unitid": "Artist", "display_graphs": False, "method": "l2",
+    }
+
+
+@case("scdense_pda")
+def scdense_pda(params, workdir):
+    from mlsynth import PDA
+
+    config = _scdense_config(params, workdir)
+
+    def run():
+        PDA(dict(config)).fit()
+
+    return run
+
+
+@case("scdense_pda_screened")
+def scdense_pda_screened(params, workdir):
+    from mlsynth import PDA
+
+    config = _scdense_config(params, workdir)
+    from screening import screen_donors
+
+    def run():
+        df, _ = screen_donors(config["df"], "Artist", "Date", "Playlist Reach", "Water", k=50)
+        PDA(dict(config, df=df)).fit()
+
+    return run
+
+
+@case("scdense_rolling")
+def scdense_rolling(params, workdir):
+    _on_path("blogcontent", "scdense")
+    import pandas as pd
+    from rolling import rolling_l2
+
+    df = synthetic.artist_frame(params["artists"], params["days"])
+    df["Date"] = pd.to_datetime(df["Date"])
+    df = df[(df["Date"] >= "2023-01-01") & (df["Date"] <= "2024-06-01")]
+    dates = pd.date_range("2023-07-01", "2023-09-30")
+
+    def run():
+        rolling_l2(df, "Artist", "Date", "Playlist Reach", "Tyla", dates)
+
+    return run
+
+
+# Python/dash: building the artist store, then the per-rerun filtering
+
+def _dash_frame(params, workdir):
+    _on_path("Python", "dash")
+    from datasource import parse_csv
+
+    frame = synthetic.artist_frame(params["artists"], params["days"])
+    frame["Date"] = frame["Date"] + " 00:00:00"
+    return parse_csv(frame.to_csv(index=False).encode())
+
+
+@case("dash_store")
+def dash_store(params, workdir):
+    data = _dash_frame(params, workdir)
+    from artiststore import ArtistStore
+
+    def run():
+        ArtistStore(data)
+
+    return run
+
+
+@case("dash_derived")
+def dash_derived(params, workdir):
+    data = _dash_frame(params, workdir)
+    from artiststore import ArtistStore
+    from derived import add_derived_metrics
+
+    return lambda: add_derived_metrics(ArtistStore(data))
+
+
+@case("dash_filter")
+def dash_filter(params, workdir):
+    data = _dash_frame(params, workdir)
+    from artiststore import ArtistStore
+    from downsample import downsample
+
+    store = ArtistStore(data)
+    rng = np.random.default_rng(0)
+    days = (store.max_date - store.min_date).days
+    interactions = []
+    for _ in range(50):
+        artists = list(rng.choice(store.artists, 5, replace=False))
+        lo, hi = np.sort(rng.integers(0, days, 2))
+        interactions.append((artists, store.min_date + timedelta(days=int(lo)), store.min_date + timedelta(days=int(hi))))
+
+    def run():
+        for artists, start, end in interactions:
+            for dates, values in store.select(artists, "Playlist Reach", start, end).values():
+                downsample(dates, values)
+
+    return run
+
+
+@case("dash_parse_csv")
+def dash_parse_csv(params, workdir):
+    _on_path("Python", "dash")
+    from datasource import parse_csv
+
+    frame = synthetic.artist_frame(params["artists"], params["days"])
+    frame["Date"] = frame["Date"] + " 00:00:00"
+    body = frame.to_csv(index=False).encode()
+
+    return lambda: parse_csv(body)
+
+
+@case("dash_partitions_read")
+def dash_partitions_read(params, workdir):
+    _on_path("Python", "dash")
+    from partitions import PartitionedSeries
+
+    frame = synthetic.artist_frame(params["artists"], params["days"])
+    store = PartitionedSeries(os.path.join(workdir, "partitions"))
+    store.backfill(frame)
+    artists = ["Tyla"] + sorted(set(frame["Artist"]) - {"Tyla"})[:4]
+
+    def run():
+        store.read("2023-01-01", "2024-06-01", artists)
+
+    return run
+
+
+# Python/Scrapers/Visa: the SMI workbook parse
+
+def _visa_workbook(params, workdir):
+    _on_path("Python", "Scrapers", "Visa")
+    return synthetic.write_visa_workbook(os.path.join(workdir, "appendix.xlsx"), params["months"])
+
+
+@case("visa_load_data")
+def visa_load_data(params, workdir):
+    path = _visa_workbook(params, workdir)
+    from visautils import load_data
+
+    return lambda: load_data(path)
+
+
+@case("visa_read_smi")
+def visa_read_smi(params, workdir):
+    path = _visa_workbook(params, workdir)
+    from visaxlsx import read_smi
+
+    return lambda: read_smi(path)
@@ -0,0 +1,126 @@
+"""
+Run the benchmarks and compare them against a stored baseline.
+
+    python -m benchmarks --scales small medium --output results.json
+    python -m benchmarks --scales small medium --baseline results.json
+
+For every case and scale, the inputs are generated first (untimed), then the
+case runs ``--repeat`` times. The first run is reported on its own because it
+pays one-off costs such as Numba compilation; ``best_s`` and ``median_s``
+cover the rest. One more run under tracemalloc gives ``peak_mb``, the peak of
+memory allocated by Python and NumPy.
+
+With ``--baseline``, a case is a regression when its best time or peak memory
+grew by more than ``--tolerance``, and the exit code is 1. Cases whose
+dependencies are not installed are reported as skipped, including cases that
+run a child process which fails for that reason.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.cases import CASES, Unavailable
+from benchmarks.synthetic import SCALES
+
+
+def measure(name, scale, repeat):
+    """Time one case at one scale; returns its row for the results file."""
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            run = CASES[name](SCALES[scale], workdir)
+
+            times = []
+            for _ in range(max(repeat, 2)):
+                start = time.perf_counter()
+                run()
+                times.append(time.perf_counter() - start)
+
+            tracemalloc.start()
+            try:
+                run()
+            finally:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+        except (ImportError, Unavailable) as e:
+            return {"skipped": f"{e.__class__.__name__}: {e}"}
+
+    return {
+        "first_s": round(times[0], 4),
+        "best_s": round(min(times[1:]), 4),
+        "median_s": round(statistics.median(times[1:]), 4),
+        "peak_mb": round(peak / 2**20, 2),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print every case against the baseline and return the regressions."""
+    old = baseline.get("results", {}) if baseline else {}
+    regressions = []
+    print(f"{'case':<32} {'best_s':>20} {'peak_mb':>20}")
+    for key, row in results["results"].items():
+        if "skipped" in row:
+            print(f"{key:<32} skipped ({row['skipped']})")
+            continue
+        cells = []
+        for col in ("best_s", "peak_mb"):
+            cell = f"{row[col]}"
+            prev = old.get(key, {}).get(col)
+            if prev:
+                change = (row[col] - prev) / prev
+                cell += f" ({change:+.0%})"
+                if change > tolerance:
+                    regressions.append(f"{key} {col}")
+            cells.append(f"{cell:>20}")
+        print(f"{key:<32} " + " ".join(cells))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", nargs="+", default=["small"], choices=list(SCALES))
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case, first included.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare against results from an earlier run.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed growth before a regression.")
+    args = parser.parse_args()
+
+    results = {
+        "config": vars(args),
+        "machine": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": {},
+    }
+    for scale in args.scales:
+        for name in args.cases:
+            results["results"][f"{name}/{scale}"] = measure(name, scale, args.repeat)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if regressions:
+        print("Regressions: " + ", ".join(regressions))
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Deterministic synthetic inputs for the benchmarks.
+
+Every generator takes a seed and writes (or returns) data laid out like the
+real inputs, so the code under test runs unchanged. ``SCALES`` sets the size
+of each input at the small, medium and large scales. The large scale puts
+400 artists into the l2 PDA fit, the dense regime scdense2.qmd warns about,
+and takes a long time.
+"""
+
+import datetime as dt
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+SCALES = {
+    "small": {
+        "stores": 20, "skus": 300, "customers": 2_000, "transactions": 20_000,
+        "artists": 60, "days": 500, "months": 60,
+    },
+    "medium": {
+        "stores": 100, "skus": 2_000, "customers": 20_000, "transactions": 200_000,
+        "artists": 200, "days": 1_000, "months": 240,
+    },
+    "large": {
+        "stores": 400, "skus": 10_000, "customers": 100_000, "transactions": 1_000_000,
+        "artists": 400, "days": 1_500, "months": 1_200,
+    },
+}
+
+CATEGORIES = ["wine-beer-spirits", "meat", "produce", "snacks-chips-salsas-dips", "dairy-eggs"]
+STATES = ["Washington", "Oregon", "California", "Texas", "New York", "Georgia"]
+
+
+def stores_frame(n_stores, seed=0):
+    """Store metadata with the columns of storemetadata.csv. Store 1630 is always present."""
+    rng = np.random.default_rng(seed)
+    ids = np.sort(rng.choice(np.arange(10_000, 99_999), n_stores, replace=False))
+    ids[0] = 1630
+    states = np.array(STATES)[rng.integers(0, len(STATES), n_stores)]
+    cities = [f"{state} City {c}" for state, c in zip(states, rng.integers(0, max(n_stores // 4, 2), n_stores))]
+    return pd.DataFrame({
+        "Store ID": ids,
+        "Store Name": [f"Store {i}" for i in ids],
+        "City": cities,
+        "State": states,
+        "Address": [f"{i} Main St" for i in ids],
+        "Phone": [f"555-{i:07d}" for i in ids],
+        "URL": [f"https://example.com/stores/{i}" for i in ids],
+    })
+
+
+def write_catalog(directory, n_stores, n_skus, seed=0):
+    """
+    Store metadata and one product CSV per category, as sqlcase.py reads them.
+
+    Each store carries a random third of the SKUs. Some files use
+    ``regular_price`` and some ``price``, and a few rows lack a price or a
+    slug, like the scraped catalog.
+
+    Returns:
+        tuple: (store metadata path, list of product file paths).
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+    stores = stores_frame(n_stores, seed)
+    store_path = os.path.join(directory, "storemetadata.csv")
+    stores.to_csv(store_path, index=False)
+
+    sku_category = rng.integers(0, len(CATEGORIES), n_skus)
+    sku_price = np.round(np.exp(rng.normal(1.5, 0.7, n_skus)), 2)
+    files = []
+    for c, category in enumerate(CATEGORIES):
+        skus = np.flatnonzero(sku_category == c)
+        carried = rng.random((n_stores, skus.size)) < 1 / 3
+        store_idx, sku_idx = np.nonzero(carried)
+        sku = skus[sku_idx]
+        price = np.round(sku_price[sku] * np.exp(rng.normal(0, 0.05, sku.size)), 2)
+        df = pd.DataFrame({
+            "Store ID": stores["Store ID"].to_numpy()[store_idx],
+            "Category": category,
+            "Product Name": [f"{category} item {s}" for s in sku],
+            "Regular Price" if c % 2 else "Price": np.where(rng.random(sku.size) < 0.01, np.nan, price),
+            "Slug": np.where(rng.random(sku.size) < 0.005, None, [f"{category}-{s}" for s in sku]),
+        })
+        path = os.path.join(directory, category, f"{category}.csv")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_csv(path, index=False)
+        files.append(path)
+    return store_path, files
+
+
+def write_retail_db(path, n_stores, n_skus, n_customers, n_transactions, seed=0):
+    """
+    A database with the tables and columns sqlcase.py writes, for panel queries.
+
+    Transactions are drawn directly with NumPy rather than through the
+    simulator, so building it stays cheap at every scale.
+    """
+    rng = np.random.default_rng(seed)
+    stores = stores_frame(n_stores, seed)
+    stores.columns = [c.lower().replace(" ", "_") for c in stores.columns]
+    dates = pd.date_range("2023-01-01", "2025-12-31").strftime("%Y-%m-%d").to_numpy()
+
+    tx_store = stores["store_id"].to_numpy()[rng.integers(0, n_stores, n_transactions)]
+    tx_date = np.sort(rng.integers(0, dates.size, n_transactions))
+    transactions = pd.DataFrame({
+        "transaction_id": np.arange(1, n_transactions + 1),
+        "customer_id": rng.integers(1, n_customers + 1, n_transactions),
+        "store_id": tx_store,
+        "sale_date": dates[tx_date],
+    })
+    baskets = np.clip(rng.poisson(2.4, n_transactions) + 1, 1, 30)
+    li_tx = np.repeat(np.arange(n_transactions), baskets)
+    line_items = pd.DataFrame({
+        "transaction_id": li_tx + 1,
+        "slug": np.char.add("sku-", rng.integers(0, n_skus, li_tx.size).astype(str)),
+        "quantity": 1 + rng.poisson(1.0, li_tx.size),
+        "price": np.round(np.exp(rng.normal(1.5, 0.7, li_tx.size)), 2),
+        "sale_date": dates[tx_date][li_tx],
+    })
+
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    stores.to_sql("stores", conn, index=False)
+    # sqlcase.py writes datetime.date values, which pandas declares DATE
+    transactions.to_sql("transactions", conn, index=False, chunksize=100_000, dtype={"sale_date": "DATE"})
+    line_items.to_sql("line_items", conn, index=False, chunksize=100_000, dtype={"sale_date": "DATE"})
+    conn.close()
+    return path
+
+
+def artist_frame(n_artists, n_days, outcome="Playlist Reach", seed=0):
+    """
+    Daily artist series laid out like the Songstats CSVs, "Tyla" included.
+
+    Tyla's series jumps after 2023-08-17, and one artist in ten starts late,
+    so the scdense filter on observation counts has something to drop.
+    """
+    rng = np.random.default_rng(seed)
+    artists = ["Tyla"] + [f"Artist {i:04d}" for i in range(1, n_artists)]
+    dates = pd.date_range(end="2024-06-01", periods=n_days)
+    walk = np.abs(rng.normal(0, 1, (n_artists, n_days)).cumsum(axis=1)) * 1e3 + 1e3
+    walk[0, dates > pd.Timestamp("2023-08-17")] *= 3
+    frame = pd.DataFrame({
+        "Artist": np.repeat(artists, n_days),
+        "Date": np.tile(dates.strftime("%Y-%m-%d"), n_artists),
+        outcome: walk.ravel().round(),
+        "Followers": rng.integers(0, 10**6, n_artists * n_days),
+    })
+    late = np.repeat(np.arange(n_artists) % 10 == 9, n_days) & np.tile(np.arange(n_days) < n_days // 3, n_artists)
+    return frame[~late].reset_index(drop=True)
+
+
+def write_visa_workbook(path, n_months, seed=0):
+    """An .xlsx laid out like Visa's SMI appendix: two header rows, a footnote row last."""
+    from openpyxl import Workbook
+
+    rng = np.random.default_rng(seed)
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "SMI"
+    ws.append(["", "", "Headline", "Total", None, "Discretionary", None, "Non-Discretionary", None])
+    ws.append(["Id", "Note", "Date"] + ["Seasonally adjusted", "Non-Seasonally\nadjusted"] * 3)
+    for a, b in [("D1", "E1"), ("F1", "G1"), ("H1", "I1")]:
+        ws.merge_cells(f"{a}:{b}")
+    values = 100 + rng.normal(0, 1, (n_months, 6)).cumsum(axis=0)
+    for i in range(n_months):
+        day = dt.datetime(1950 + i // 12, i % 12 + 1, 1)
+        ws.append([i, "x", day] + [round(float(v), 3) for v in values[i]])
+    ws.append(["Source: Visa", None, None])
+    wb.save(path)
+    return path
@@ -4,6 +4,9 @@ import matplotlib
 import os
 import matplotlib.pyplot as plt
 
+from screening import screen_donors
+from seriesio import read_series
+
 def set_theme():
     theme = {
         "axes.grid": True,
@@ -37,7 +40,7 @@ def normalize(group, column_name, reference_date):
 
 def preprocess_data(url, date_range, column_name, treat_artist, reference_date):
     # Load the data
-    df = pd.read_csv(url)
+    df = read_series(url, date_range)
     df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
 
     # Filter by date range
@@ -68,137 +71,156 @@ def preprocess_data(url, date_range, column_name, treat_artist, reference_date):
     return df
 
 
+# Donors kept by the pre-period correlation screen (screening.py) before each
+# l2 fit; None fits on every artist preprocess_data keeps
+SCREEN_DONORS = None
+
+
+def screen(df, outcome, screen_k):
+    if screen_k is None:
+        return df
+    screened, scores = screen_donors(df, "Artist", "Date", outcome, "Water", k=screen_k)
+    print(f"Screened {df['Artist'].nunique() - 1} donors down to {len(scores)} for {outcome}")
+    return screened
+
+
+def main(screen_k=SCREEN_DONORS):
+    # Set theme
+    set_theme()
 
+    # Define the save directory (blogcontent/scdense/figures/)
+    save_directory = os.path.join(os.getcwd(), "blogcontent", "scdense", "figures")
 
+    # Create the directory if it doesn't exist
+    if not os.path.exists(save_directory):
+        os.makedirs(save_directory)
 
-# Set theme
-set_theme()
-
-# Define the save directory (blogcontent/scdense/figures/)
-save_directory = os.path.join(os.getcwd(), "blogcontent", "scdense", "figures")
-
-# Create the directory if it doesn't exist
-if not os.path.exists(save_directory):
-    os.makedirs(save_directory)
-
-# Define the filename and extension
-save_1 = {
-    "filename": "SpotifyTyla",  # New filename
-    "extension": "png",  # Desired extension
-    "directory": save_directory,  # Save in the specified directory
-}
-
-outcome = 'Playlist Reach'
-
-# Spotify Data
-spotify_url = "https://raw.githubusercontent.com/jgreathouse9/jgreathouse9.github.io/refs/heads/master/Spotify/Merged_Spotify_Data.csv"
-spotify_date_range = ['2023-01-01', '2024-06-01']
-spotify_df = preprocess_data(
-    url=spotify_url,
-    date_range=spotify_date_range,
-    column_name=outcome,
-    treat_artist='Tyla',
-    reference_date='2023-08-17'
-)
+    # Define the filename and extension
+    save_1 = {
+        "filename": "SpotifyTyla",  # New filename
+        "extension": "png",  # Desired extension
+        "directory": save_directory,  # Save in the specified directory
+    }
 
-spotify_config = {
-    "df": spotify_df,
-    "treat": "Water",
-    "time": "Date",
-    "outcome": outcome,
-    "unitid": "Artist",
-    "counterfactual_color": ["red"],
-    "treated_color": "black",
-    "display_graphs": True,
-    "method": "l2",
-    "save": save_1
-}
+    outcome = 'Playlist Reach'
+
+    # Spotify Data
+    spotify_url = "https://raw.githubusercontent.com/jgreathouse9/jgreathouse9.github.io/refs/heads/master/Spotify/Merged_Spotify_Data.csv"
+    spotify_date_range = ['2023-01-01', '2024-06-01']
+    spotify_df = preprocess_data(
+        url=spotify_url,
+        date_range=spotify_date_range,
+        column_name=outcome,
+        treat_artist='Tyla',
+        reference_date='2023-08-17'
+    )
 
-spotify_model = PDA(spotify_config)
-ARCO_results = spotify_model.fit()
+    spotify_df = screen(spotify_df, outcome, screen_k)
+
+    spotify_config = {
+        "df": spotify_df,
+        "treat": "Water",
+        "time": "Date",
+        "outcome": outcome,
+        "unitid": "Artist",
+        "counterfactual_color": ["red"],
+        "treated_color": "black",
+        "display_graphs": True,
+        "method": "l2",
+        "save": save_1
+    }
 
-att = ARCO_results.effects.att
-se = ARCO_results.effects.att_std_err
+    spotify_model = PDA(spotify_config)
+    ARCO_results = spotify_model.fit()
 
-required_data = {
-    "ATT": att,
-    "Standard Error": se,
-    "t-stat": att / se,
-    "Confidence Interval": (ARCO_results.inference.ci_lower, ARCO_results.inference.ci_upper),
-    "RMSE (T0)": ARCO_results.fit_diagnostics.rmse_pre,
-    "p-value": ARCO_results.inference.p_value
-}
+    att = ARCO_results.effects.att
+    se = ARCO_results.effects.att_std_err
 
-# Convert the filtered data into a DataFrame
-table_df = pd.DataFrame(list(required_data.items()), columns=["Metric", "Value"])
+    required_data = {
+        "ATT": att,
+        "Standard Error": se,
+        "t-stat": att / se,
+        "Confidence Interval": (ARCO_results.inference.ci_lower, ARCO_results.inference.ci_upper),
+        "RMSE (T0)": ARCO_results.fit_diagnostics.rmse_pre,
+        "p-value": ARCO_results.inference.p_value
+    }
 
-# Display the DataFrame as a markdown table
-markdown_table = table_df.to_markdown(index=False)
+    # Convert the filtered data into a DataFrame
+    table_df = pd.DataFrame(list(required_data.items()), columns=["Metric", "Value"])
 
-# Print the markdown table
-print(markdown_table)
+    # Display the DataFrame as a markdown table
+    markdown_table = table_df.to_markdown(index=False)
 
+    # Print the markdown table
+    print(markdown_table)
 
 
-# Define the filename and extension
-save_2 = {
-    "filename": "AppleTyla",  # New filename
-    "extension": "png",  # Desired extension
-    "directory": save_directory,  # Save in the specified directory
-}
 
+    # Define the filename and extension
+    save_2 = {
+        "filename": "AppleTyla",  # New filename
+        "extension": "png",  # Desired extension
+        "directory": save_directory,  # Save in the specified directory
+    }
+
+
+    # Apple Music Data
+    apple_url = "https://raw.githubusercontent.com/jgreathouse9/jgreathouse9.github.io/refs/heads/master/Apple%20Music/AppleMusic.csv"
+    apple_date_range = ['2022-01-01', '2024-06-01']
+    apple_df = preprocess_data(
+        url=apple_url,
+        date_range=apple_date_range,
+        column_name='Playlists',
+        treat_artist='Tyla',
+        reference_date='2023-08-17'
+    )
+    appleoutcome = 'Playlists'
+    apple_df = screen(apple_df, appleoutcome, screen_k)
+
+    apple_config = {
+        "df": apple_df,
+        "treat": "Water",
+        "time": "Date",
+        "outcome": "Playlists",
+        "unitid": "Artist",
+        "counterfactual_color": ["red"],
+        "treated_color": "black",
+        "display_graphs": True,
+        "method": "l2",
+        "save": save_2
+    }
+
+    apple_model = PDA(apple_config)
+    apple_results = apple_model.fit()
+
+
+    # Extracting only the required values: ATT, SE, t-stat, CI, RMSE, R-squared
+    apple_att = apple_results.effects.att
+    apple_se = apple_results.effects.att_std_err
+
+    required_data = {
+        "ATT": apple_att,
+        "Standard Error": apple_se,
+        "t-stat": apple_att / apple_se,
+        "Confidence Interval": (apple_results.inference.ci_lower, apple_results.inference.ci_upper),
+        "RMSE (T0)": apple_results.fit_diagnostics.rmse_pre,
+        "p-value": apple_results.inference.p_value
+    }
 
-# Apple Music Data
-apple_url = "https://raw.githubusercontent.com/jgreathouse9/jgreathouse9.github.io/refs/heads/master/Apple%20Music/AppleMusic.csv"
-apple_date_range = ['2022-01-01', '2024-06-01']
-apple_df = preprocess_data(
-    url=apple_url,
-    date_range=apple_date_range,
-    column_name='Playlists',
-    treat_artist='Tyla',
-    reference_date='2023-08-17'
-)
-appleoutcome = 'Playlists'
+    # Convert the filtered data into a DataFrame
+    appletable_df = pd.DataFrame(list(required_data.items()), columns=["Metric", "Value"])
 
-apple_config = {
-    "df": apple_df,
-    "treat": "Water",
-    "time": "Date",
-    "outcome": "Playlists",
-    "unitid": "Artist",
-    "counterfactual_color": ["red"],
-    "treated_color": "black",
-    "display_graphs": True,
-    "method": "l2",
-    "save": save_2
-}
-
-apple_model = PDA(apple_config)
-apple_results = apple_model.fit()
-
-
-# Extracting only the required values: ATT, SE, t-stat, CI, RMSE, R-squared
-apple_att = apple_results.effects.att
-apple_se = apple_results.effects.att_std_err
-
-required_data = {
-    "ATT": apple_att,
-    "Standard Error": apple_se,
-    "t-stat": apple_att / apple_se,
-    "Confidence Interval": (apple_results.inference.ci_lower, apple_results.inference.ci_upper),
-    "RMSE (T0)": apple_results.fit_diagnostics.rmse_pre,
-    "p-value": apple_results.inference.p_value
-}
-
-# Convert the filtered data into a DataFrame
-appletable_df = pd.DataFrame(list(required_data.items()), columns=["Metric", "Value"])
-
-# Display the DataFrame as a markdown table
-applemarkdown_table = appletable_df.to_markdown(index=False)
-
-# Print the markdown table
-print(applemarkdown_table)
+    # Display the DataFrame as a markdown table
+    applemarkdown_table = appletable_df.to_markdown(index=False)
 
+    # Print the markdown table
+    print(applemarkdown_table)
 
 
+if __name__ == "__main__":
+    import argparse
 
+    parser = argparse.ArgumentParser(description="Fit the l2 PDA for Tyla on Spotify and Apple Music.")
+    parser.add_argument("--screen", type=int, default=SCREEN_DONORS, metavar="K",
+                        help="Keep only the K donors best correlated with Tyla before each fit.")
+    main(parser.parse_args().screen)
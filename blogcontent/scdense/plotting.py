@@ -4,6 +4,8 @@ import matplotlib.pyplot as plt
 from mlsynth.utils.datautils import dataprep
 import os
 
+from seriesio import read_series
+
 # Set up theme for Matplotlib
 def set_theme():
     theme = {
@@ -37,7 +39,7 @@ def normalize(group, column_name, reference_date):
 
 # Function to preprocess data
 def preprocess_data(url, date_range, column_name, treat_artist, reference_date):
-    df = pd.read_csv(url)
+    df = read_series(url, date_range)
     df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
     df = df[(df['Date'] >= date_range[0]) & (df['Date'] <= date_range[1])]
     df['Water'] = df.apply(
@@ -0,0 +1,197 @@
+from time import perf_counter
+
+import numpy as np
+import osqp
+import pandas as pd
+import scipy.sparse as sp
+from mlsynth.utils.pda_helpers.l2 import cross_validate_tau, fit_l2
+
+
+# Rolling-origin l2 fits: the Tyla estimate for many candidate treatment dates.
+#
+# Refitting PDA for every date repeats the whole pre-period Gram matrix and a
+# cold l2 solve each time, though moving the date by a day only adds one row
+# to the pre-period. rolling_l2 keeps the raw cross-products (X'X, X'y and the
+# column sums) and adds only the new rows as the date moves forward. The
+# standardised Sigma and eta the l2-relaxation needs come from those sums. Each
+# l2 solve starts from the previous date's solution.
+#
+# The fit is the one mlsynth's PDA runs with method "l2" (standardised
+# L2-relaxation, Shi & Wang 2024), except for tau. PDA re-validates tau on
+# every fit; here it is validated once, at the first date, and then held
+# fixed, unless one is given. Validation and the reference refits use the
+# l2 helpers mlsynth exports from mlsynth.utils.pda_helpers.l2 (mlsynth 1.0).
+#
+# The reference date also sets the normalisation in preprocess_data (each
+# artist = 100 on that date). Standardisation makes the fit invariant to
+# rescaling a donor, so the sweep runs on the raw series. Each date's
+# estimates are then rescaled by 100 / Tyla's value on that date, which is
+# what preprocess_data with that reference date would give.
+
+
+def wide_panel(df, unitid, time, outcome, treated_unit):
+    """Treated series, donor names and donor matrix over the dates every unit observes."""
+    wide = df.pivot_table(index=time, columns=unitid, values=outcome, aggfunc="first").sort_index()
+    wide = wide.dropna(axis=1, thresh=int(wide[treated_unit].notna().sum())).dropna()
+    y = wide.pop(treated_unit)
+    return wide.index, y.to_numpy(dtype=float), wide.columns.to_numpy(), wide.to_numpy(dtype=float)
+
+
+class GramAccumulator:
+    """
+    Running pre-period cross-products of donors ``X`` and the treated ``y``.
+
+    ``extend(X_new, y_new)`` adds rows; ``moments()`` gives the standardised
+    ``Sigma = Xt'Xt / n`` and ``eta = Xt'yt / n`` (columns demeaned and scaled
+    to unit sample variance), plus what is needed to map a solution back.
+    """
+
+    def __init__(self, n_donors):
+        self.n = 0
+        self.sx = np.zeros(n_donors)
+        self.sy = 0.0
+        self.xx = np.zeros((n_donors, n_donors))
+        self.xy = np.zeros(n_donors)
+        self.yy = 0.0
+
+    def extend(self, X_new, y_new):
+        self.n += len(y_new)
+        self.sx += X_new.sum(axis=0)
+        self.sy += y_new.sum()
+        self.xx += X_new.T @ X_new
+        self.xy += X_new.T @ y_new
+        self.yy += y_new @ y_new
+
+    def moments(self):
+        n = self.n
+        mu_x, mu_y = self.sx / n, self.sy / n
+        cov_xx = self.xx - n * np.outer(mu_x, mu_x)
+        cov_xy = self.xy - n * mu_x * mu_y
+        sd_x = np.sqrt(np.maximum(np.diag(cov_xx), 0) / (n - 1))
+        sd_x = np.where(sd_x > 0, sd_x, 1.0)
+        sd_y = np.sqrt(max(self.yy - n * mu_y * mu_y, 0) / (n - 1)) or 1.0
+        sigma = cov_xx / np.outer(sd_x, sd_x) / n
+        eta = cov_xy / (sd_x * sd_y) / n
+        return sigma, eta, mu_x, mu_y, sd_x, sd_y
+
+
+class WarmL2Solver:
+    """
+    The L2-relaxation primal ``min ||b||^2 / 2  s.t.  ||eta - Sigma b||_inf <= tau``,
+    solved with OSQP at mlsynth's tolerance and started from the previous
+    date's primal and dual solution.
+
+    Each solve sets OSQP up again rather than updating Sigma in place: the
+    scaling OSQP computes at setup is kept by updates, and once Sigma has
+    moved away from the matrix it was computed for, updated solves take more
+    iterations than fresh ones.
+    """
+
+    def __init__(self, eps=1e-9, max_iter=50000):
+        self.eps = eps
+        self.max_iter = max_iter
+        self.previous = None
+        self.iterations = 0
+
+    def solve(self, sigma, eta, tau):
+        prob = osqp.OSQP()
+        prob.setup(
+            P=sp.eye(len(eta), format="csc"), q=np.zeros(len(eta)),
+            A=sp.csc_matrix(sigma), l=eta - tau, u=eta + tau,
+            eps_abs=self.eps, eps_rel=self.eps, max_iter=self.max_iter,
+            polish=False, warm_starting=True, verbose=False,
+        )
+        if self.previous is not None:
+            prob.warm_start(x=self.previous.x, y=self.previous.y)
+        result = prob.solve()
+        self.iterations = result.info.iter
+        if result.x is None or not np.all(np.isfinite(result.x)):
+            self.previous = None
+            raise RuntimeError("L2-relaxation failed: OSQP did not converge.")
+        self.previous = result
+        return result.x
+
+
+def rolling_l2(df, unitid, time, outcome, treated_unit, dates, tau=None):
+    """
+    Fit the l2 PDA for every candidate treatment date in ``dates``.
+
+    Args:
+        df (pd.DataFrame): Long panel of raw (not normalised) outcomes.
+        unitid, time, outcome (str): Column names.
+        treated_unit (str): The treated artist, e.g. "Tyla".
+        dates (iterable): Candidate treatment dates; the pre-period of each
+            runs through that date, as the Water indicator in preprocess_data.
+        tau (float): The l2 bound on the standardised scale. None validates it
+            once, at the earliest date, with mlsynth's cross_validate_tau.
+
+    Returns:
+        pd.DataFrame: One row per date: ATT and pre-period RMSE on the scale
+        preprocess_data would give for that reference date, the raw-scale
+        ATT, pre- and post-period lengths, tau and OSQP iterations.
+    """
+    index, y, donors, X = wide_panel(df, unitid, time, outcome, treated_unit)
+    dates = np.sort(pd.to_datetime(pd.Index(dates)).unique())
+    ends = np.searchsorted(index.values, dates, "right")
+
+    gram = GramAccumulator(X.shape[1])
+    solver = WarmL2Solver()
+    rows, done = [], 0
+    for date, t0 in zip(dates, ends):
+        if t0 < 3 or t0 >= len(y):
+            continue
+        gram.extend(X[done:t0], y[done:t0])
+        done = t0
+        if tau is None:
+            tau = cross_validate_tau(y[:t0], X[:t0])
+        sigma, eta, mu_x, mu_y, sd_x, sd_y = gram.moments()
+        beta = sd_y * solver.solve(sigma, eta, tau) / sd_x
+        counterfactual = X @ beta + (mu_y - mu_x @ beta)
+        gap = y - counterfactual
+        scale = 100 / y[t0 - 1] if y[t0 - 1] else np.nan
+        rows.append({
+            "date": date,
+            "att": gap[t0:].mean() * scale,
+            "rmse_pre": np.sqrt(np.mean(gap[:t0] ** 2)) * scale,
+            "att_raw": gap[t0:].mean(),
+            "pre_periods": t0,
+            "post_periods": len(y) - t0,
+            "tau": tau,
+            "iterations": solver.iterations,
+        })
+    return pd.DataFrame(rows).set_index("date")
+
+
+def compare_with_refits(df, unitid, time, outcome, treated_unit, dates, tau=None):
+    """
+    Time rolling_l2 against a cold mlsynth fit_l2 per date with the same tau.
+
+    When ``tau`` is None a first, untimed sweep validates it, so neither
+    timing includes validation.
+
+    Returns:
+        dict: Seconds for each, and the largest raw-scale ATT difference
+        between them.
+    """
+    if tau is None:
+        tau = rolling_l2(df, unitid, time, outcome, treated_unit, dates)["tau"].iloc[0]
+
+    start = perf_counter()
+    rolled = rolling_l2(df, unitid, time, outcome, treated_unit, dates, tau)
+    rolling_s = perf_counter() - start
+
+    _, y, _, X = wide_panel(df, unitid, time, outcome, treated_unit)
+    start = perf_counter()
+    refit = []
+    for t0 in rolled["pre_periods"]:
+        _, _, counterfactual, _ = fit_l2(y, X, int(t0), tau=tau)
+        refit.append((y - counterfactual)[int(t0):].mean())
+    refit_s = perf_counter() - start
+
+    return {
+        "dates": len(rolled),
+        "rolling_s": round(rolling_s, 3),
+        "refit_s": round(refit_s, 3),
+        "mean_iterations": float(rolled["iterations"].mean()),
+        "max_att_raw_diff": float(np.max(np.abs(rolled["att_raw"].to_numpy() - refit))),
+    }
@@ -0,0 +1,143 @@
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+
+# Donor pre-screening for the l2 PDA fit.
+#
+# preprocess_data keeps every artist observed at least as often as the treated
+# one, and all of them go to PDA. With hundreds of artists the l2 fit enters
+# the dense regime scdense2.qmd warns about. screen_donors scores every
+# candidate against the treated unit's pre-period in one pass, a block of
+# donors at a time, and keeps the k best before the fit.
+
+
+def pre_period(df, unitid, time, outcome, treat):
+    """
+    The pre-period as a matrix.
+
+    Returns:
+        tuple: (treated unit name, treated pre-period values (T0,),
+        donor names, donor values (T0, N) with NaN where a donor is unobserved).
+    """
+    treated_unit = df.loc[df[treat] == 1, unitid].iloc[0]
+    treated = df[df[unitid] == treated_unit]
+    pre_dates = treated.loc[treated[treat] == 0, time]
+    wide = (
+        df[df[time].isin(pre_dates)]
+        .pivot_table(index=time, columns=unitid, values=outcome, aggfunc="first")
+        .reindex(np.sort(pre_dates.unique()))
+    )
+    y = wide.pop(treated_unit).to_numpy(dtype=float)
+    return treated_unit, y, wide.columns.to_numpy(), wide.to_numpy(dtype=float)
+
+
+def donor_scores(y, donors, method="correlation", block_size=1024):
+    """
+    Score every donor column against ``y`` over the periods both observe.
+
+    All sums are taken with matrix-vector products over blocks of
+    ``block_size`` donors, so thousands of candidates cost a few BLAS calls
+    and memory stays bounded.
+
+    Args:
+        y (np.ndarray): Treated pre-period, shape (T0,).
+        donors (np.ndarray): Donor pre-periods, shape (T0, N), NaN when missing.
+        method (str): "correlation" (higher is better) or "distance"
+            (negative RMSE, so higher is better too).
+        block_size (int): Donors per block.
+
+    Returns:
+        np.ndarray: One score per donor; NaN when a donor cannot be scored.
+    """
+    observed_y = ~np.isnan(y)
+    y0 = np.where(observed_y, y, 0.0)
+    scores = np.full(donors.shape[1], np.nan)
+    for lo in range(0, donors.shape[1], block_size):
+        block = donors[:, lo:lo + block_size]
+        mask = (~np.isnan(block) & observed_y[:, None]).astype(float)
+        x = np.where(mask > 0, block, 0.0)
+        n = mask.sum(axis=0)
+        sx, sxx, sxy = x.sum(axis=0), (x * x).sum(axis=0), x.T @ y0
+        sy, syy = mask.T @ y0, mask.T @ (y0 * y0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if method == "correlation":
+                cov = n * sxy - sx * sy
+                var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+                score = cov / np.sqrt(var)
+            elif method == "distance":
+                score = -np.sqrt(np.maximum(sxx - 2 * sxy + syy, 0) / n)
+            else:
+                raise ValueError(f"Unknown screening method: {method}")
+        scores[lo:lo + block_size] = np.where(n > 1, score, np.nan)
+    return scores
+
+
+def screen_donors(df, unitid, time, outcome, treat, k=50, method="correlation", block_size=1024):
+    """
+    Keep the treated unit and its ``k`` best-scoring donors.
+
+    Args:
+        df (pd.DataFrame): Long panel, as returned by preprocess_data.
+        unitid, time, outcome, treat (str): Column names, as in the PDA config.
+        k (int): Donors to keep.
+        method (str): See donor_scores.
+        block_size (int): See donor_scores.
+
+    Returns:
+        tuple: (screened panel, pd.Series of the kept donors' scores, best first).
+    """
+    treated_unit, y, names, donors = pre_period(df, unitid, time, outcome, treat)
+    scores = donor_scores(y, donors, method, block_size)
+    ranked = np.where(np.isnan(scores), -np.inf, scores)
+    k = min(k, len(names))
+    best = np.argpartition(-ranked, k - 1)[:k] if k else np.array([], dtype=int)
+    best = best[np.argsort(-ranked[best])]
+    kept = pd.Series(scores[best], index=names[best], name=method)
+    screened = df[df[unitid].isin(kept.index) | (df[unitid] == treated_unit)]
+    return screened.reset_index(drop=True), kept
+
+
+def compare_screening(config, k=50, method="correlation"):
+    """
+    Fit PDA on every donor and on the screened donors; report time and fit.
+
+    Args:
+        config (dict): A PDA config; its "df" is screened and
+            "display_graphs" is turned off for both fits.
+        k (int): Donors kept by the screen.
+        method (str): See donor_scores.
+
+    Returns:
+        dict: Donor counts, seconds for each fit (the screened one includes
+        screening), and ATT and pre-period RMSE from each.
+    """
+    from mlsynth import PDA
+
+    config = dict(config, display_graphs=False)
+    config.pop("save", None)
+    columns = (config["unitid"], config["time"], config["outcome"], config["treat"])
+
+    start = perf_counter()
+    full = PDA(dict(config)).fit()
+    full_s = perf_counter() - start
+
+    start = perf_counter()
+    screened_df, kept = screen_donors(config["df"], *columns, k=k, method=method)
+    screen_s = perf_counter() - start
+    screened = PDA(dict(config, df=screened_df)).fit()
+    screened_s = perf_counter() - start
+
+    return {
+        "donors": config["df"][config["unitid"]].nunique() - 1,
+        "donors_kept": len(kept),
+        "full_s": round(full_s, 3),
+        "screen_s": round(screen_s, 3),
+        "screened_s": round(screened_s, 3),
+        "saved_s": round(full_s - screened_s, 3),
+        "att_full": full.effects.att,
+        "att_screened": screened.effects.att,
+        "rmse_pre_full": full.fit_diagnostics.rmse_pre,
+        "rmse_pre_screened": screened.fit_diagnostics.rmse_pre,
+    }
@@ -0,0 +1,15 @@
+import os
+
+import pandas as pd
+
+# Read a CSV, or a directory of date-partitioned Parquet files (Python/dash/partitions.py),
+# opening only the files in the date range
+def read_series(url, date_range):
+    if os.path.isdir(url):
+        df = pd.read_parquet(url, filters=[
+            ("Date", ">=", pd.Timestamp(date_range[0])),
+            ("Date", "<=", pd.Timestamp(date_range[1])),
+        ])
+        df['Artist'] = df['Artist'].astype(str)
+        return df
+    return pd.read_csv(url)
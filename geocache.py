@@ -0,0 +1,127 @@
+# # Persistent geocode cache for talkmap.py
+#
+# Nominatim allows about one request per second, so geocoding every talk on
+# every run gets slow as the list grows. `geocode_all` geocodes each distinct
+# location once: names are normalized (case and whitespace) and deduplicated,
+# locations found on earlier runs come from a JSON cache on disk, and only the
+# new ones are sent to the geocoder, spaced out to respect its rate limit and
+# retried with backoff when it refuses.
+#
+# The geocoder is anything with a `geocode(query)` method returning an object
+# with `address`, `latitude` and `longitude` (or None), such as geopy's
+# Nominatim. `StaticGeocoder` stands in for it offline.
+
+import json
+import os
+import time
+from collections import namedtuple
+
+from geopy.exc import GeocoderRateLimited, GeocoderServiceError
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "talkmap", "geocode-cache.json")
+
+# What getorg needs from a geopy Location
+Place = namedtuple("Place", ["address", "latitude", "longitude"])
+
+
+def normalize(location):
+    """Cache key for a location: case-folded, with runs of whitespace collapsed."""
+    return " ".join(location.split()).casefold()
+
+
+class StaticGeocoder:
+    """Offline geocoder answering from a dict of location -> (latitude, longitude)."""
+
+    def __init__(self, places):
+        self.places = {normalize(name): coords for name, coords in places.items()}
+        self.calls = []
+
+    def geocode(self, query):
+        self.calls.append(query)
+        coords = self.places.get(normalize(query))
+        return None if coords is None else Place(query, *coords)
+
+
+class GeoCache:
+    """Normalized location -> Place (or None when the geocoder found nothing), kept as JSON."""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.places = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.places = json.load(f)
+
+    def __contains__(self, location):
+        return normalize(location) in self.places
+
+    def get(self, location):
+        place = self.places.get(normalize(location))
+        return None if place is None else Place(**place)
+
+    def set(self, location, place):
+        self.places[normalize(location)] = None if place is None else {
+            "address": place.address,
+            "latitude": place.latitude,
+            "longitude": place.longitude,
+        }
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.places, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def geocode_all(locations, geocoder, cache, min_interval=1.0, retries=3, save_every=10, retry_missing=False):
+    """
+    Geocode locations, sending only ones the cache has not seen to the geocoder.
+
+    Args:
+        locations (iterable): Location strings, repeats allowed.
+        geocoder: Object with a ``geocode(query)`` method.
+        cache (GeoCache): Results from earlier runs. Updated and saved.
+        min_interval (float): Seconds between requests.
+        retries (int): Attempts per location when the service errors; at least 1.
+        save_every (int): Save the cache after this many requests, so an
+            interrupted run keeps its progress.
+        retry_missing (bool): Ask again for locations that found nothing before.
+
+    Returns:
+        dict: Location as given -> Place, or None if it could not be found.
+    """
+    if retries < 1:
+        raise ValueError(f"retries must be at least 1, got {retries}")
+    locations = list(locations)
+    pending = {}
+    for location in locations:
+        key = normalize(location)
+        if key in pending:
+            continue
+        if location not in cache or (retry_missing and cache.get(location) is None):
+            pending[key] = location
+
+    last, done = 0.0, 0
+    for location in pending.values():
+        delay = min_interval
+        for _ in range(retries):
+            wait = last + delay - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            last = time.monotonic()
+            try:
+                cache.set(location, geocoder.geocode(location))
+                break
+            except GeocoderRateLimited as e:
+                error, delay = e, max(e.retry_after or 0, delay * 2)
+            except GeocoderServiceError as e:
+                error, delay = e, delay * 2
+        else:
+            print(f"Could not geocode {location}: {error}")
+        done += 1
+        if done % save_every == 0:
+            cache.save()
+    if pending:
+        cache.save()
+
+    return {location: cache.get(location) for location in locations}
@@ -0,0 +1,75 @@
+# coding: utf-8
+
+# # Shared helpers for the markdown generators
+#
+# `html_escape` replaces quotes and ampersands with HTML entities in one pass
+# with `str.translate`.
+#
+# `IncrementalWriter` writes a generated file only when its content changed,
+# so unchanged pages keep their mtime and Jekyll does not rebuild them. It
+# keeps a manifest (a dotfile, which Jekyll ignores) of the files it wrote
+# and their hashes, and deletes files it wrote on an earlier run that no
+# longer have a row in the TSV. Files it never wrote are left alone.
+
+import hashlib
+import json
+import os
+
+html_escape_table = str.maketrans({
+    "&": "&amp;",
+    '"': "&quot;",
+    "'": "&apos;"
+    })
+
+def html_escape(text):
+    """Produce entities within text."""
+    return text.translate(html_escape_table)
+
+
+def _digest(content):
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+class IncrementalWriter:
+    """Write generated files into `out_dir`, skipping the ones that did not change."""
+
+    def __init__(self, out_dir, manifest):
+        self.out_dir = out_dir
+        self.manifest_path = manifest
+        self.previous = {}
+        if os.path.exists(manifest):
+            with open(manifest) as f:
+                self.previous = json.load(f)
+        self.current = {}
+        self.counts = {"written": 0, "unchanged": 0, "deleted": 0}
+
+    def write(self, filename, content):
+        digest = _digest(content)
+        path = os.path.join(self.out_dir, filename)
+        self.current[filename] = digest
+        if os.path.exists(path):
+            if self.previous.get(filename) == digest:
+                self.counts["unchanged"] += 1
+                return False
+
+            # Not in the manifest yet (first run), but the file may already match
+
+            with open(path, encoding="utf-8") as f:
+                if _digest(f.read()) == digest:
+                    self.counts["unchanged"] += 1
+                    return False
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        self.counts["written"] += 1
+        return True
+
+    def finish(self):
+        """Delete orphaned outputs, save the manifest, and return the counts."""
+        for filename in set(self.previous) - set(self.current):
+            path = os.path.join(self.out_dir, filename)
+            if os.path.exists(path):
+                os.remove(path)
+                self.counts["deleted"] += 1
+        with open(self.manifest_path, "w") as f:
+            json.dump(self.current, f, indent=1, sort_keys=True)
+        return self.counts
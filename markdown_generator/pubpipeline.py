@@ -0,0 +1,313 @@
+# coding: utf-8
+
+# # Publication pipeline for BibTeX and TSV sources
+#
+# One pipeline behind `pubsFromBib.py` and `publications.py`. Both kinds of source share the escaping (`mdwriter.html_escape`), slug and date normalization below, and both write through `mdwriter.IncrementalWriter`, so only changed pages are rewritten.
+#
+# Parsing is cached in `.pubcache.json`, keyed by each source file's hash and then by each entry's key and the hash of its text. When a `.bib` file has not changed, nothing is parsed. When it has, it is split into entries as text, and only entries whose text changed go back through pybtex. The parsing and rendering of changed entries is spread across a process pool.
+#
+# The cache also records a hash of this file (which holds the templates) and of `mdwriter.py`, so editing either invalidates it.
+
+import hashlib
+import html
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from string import Template
+from time import strptime
+
+import pandas as pd
+
+from mdwriter import IncrementalWriter, html_escape
+
+CACHE_PATH = ".pubcache.json"
+
+_code = hashlib.sha1()
+for _path in (__file__, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mdwriter.py")):
+    with open(_path, "rb") as f:
+        _code.update(f.read())
+CODE_VERSION = _code.hexdigest()
+
+
+def _sha(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+# ## Shared normalization
+
+def strip_braces(text):
+    """Strip out {} and backslashes (some bibtex entries keep formatting this way)."""
+    return text.replace("{", "").replace("}", "").replace("\\", "")
+
+
+def make_slug(title):
+    """URL slug from a title: hyphens for spaces, then only [a-zA-Z0-9_-]."""
+    clean_title = strip_braces(title).replace(" ", "-")
+    return re.sub("\\[.*\\]|[^a-zA-Z0-9_-]", "", clean_title).replace("--", "-")
+
+
+def normalize_date(year, month=None, day=None):
+    """YYYY-MM-DD from bibtex-style year, month ("3", "03", "mar", "March") and day."""
+    pub_month = "01"
+    if month is not None:
+        if len(month) < 3:
+            pub_month = ("0" + month)[-2:]
+        else:
+            pub_month = "{:02d}".format(strptime(month[:3], "%b").tm_mon)
+    pub_day = "01" if day is None else str(day)
+    return f"{year}-{pub_month}-{pub_day}"
+
+
+# ## Templates
+
+bibtex_template = Template(
+    "---\ntitle: \"$title\"\n"
+    "collection: $collection"
+    "\npermalink: $permalink$html_filename"
+    "$excerpt"
+    "\ndate: $pub_date"
+    "\nvenue: '$venue'"
+    "$paperurl"
+    "\ncitation: '$citation'"
+    "\n---"
+    "$body"
+)
+
+tsv_template = Template(
+    "---\ntitle: \"$title\"\n"
+    "collection: publications"
+    "\npermalink: /publication/$html_filename"
+    "$excerpt"
+    "\ndate: $pub_date"
+    "\nvenue: '$venue'"
+    "$paperurl"
+    "\ncitation: '$citation'"
+    "\n---"
+    "$body"
+)
+
+
+# ## Rendering one entry (runs in the worker processes)
+
+def render_bibtex(args):
+    """Parse one bibtex entry (with the file's @string macros) and render its page."""
+    from pybtex.database.input import bibtex
+
+    bib_id, text, source = args
+    entry = bibtex.Parser().parse_string(text).entries[bib_id]
+    b = entry.fields
+    try:
+        pub_year = f'{b["year"]}'
+        pub_date = normalize_date(pub_year, b.get("month"), b.get("day"))
+
+        clean_title = strip_braces(b["title"]).replace(" ", "-")
+        url_slug = make_slug(b["title"])
+        md_filename = (str(pub_date) + "-" + url_slug + ".md").replace("--", "-")
+        html_filename = (str(pub_date) + "-" + url_slug).replace("--", "-")
+
+        # Build citation from text
+
+        citation = ""
+        for author in entry.persons["author"]:
+            citation = citation + " " + author.first_names[0] + " " + author.last_names[0] + ", "
+        citation = citation + "\"" + html_escape(strip_braces(b["title"])) + ".\""
+        venue = source["venue-pretext"] + strip_braces(b[source["venuekey"]])
+        citation = citation + " " + html_escape(venue)
+        citation = citation + ", " + pub_year + "."
+
+        note = "note" in b and len(str(b["note"])) > 5
+        url = "url" in b and len(str(b["url"])) > 5
+        body = "\n" + html_escape(b["note"]) + "\n" if note else ""
+        if url:
+            body += "\n[Access paper here](" + b["url"] + "){:target=\"_blank\"}\n"
+        else:
+            body += "\nUse [Google Scholar](https://scholar.google.com/scholar?q=" + html.escape(clean_title.replace("-", "+")) + "){:target=\"_blank\"} for full citation"
+
+        md = bibtex_template.substitute(
+            title=html_escape(strip_braces(b["title"])),
+            collection=source["collection"]["name"],
+            permalink=source["collection"]["permalink"],
+            html_filename=html_filename,
+            excerpt="\nexcerpt: '" + html_escape(b["note"]) + "'" if note else "",
+            pub_date=pub_date,
+            venue=html_escape(venue),
+            paperurl="\npaperurl: '" + b["url"] + "'" if url else "",
+            citation=html_escape(citation),
+            body=body,
+        )
+        message = f'SUCESSFULLY PARSED {bib_id}: " {b["title"][:60]} {"..." * (len(b["title"]) > 60)} "'
+        return {"filename": os.path.basename(md_filename), "content": md, "message": message}
+    # field may not exist for a reference
+    except KeyError as e:
+        message = f'WARNING Missing Expected Field {e} from entry {bib_id}: " {b["title"][:30]} {"..." * (len(b["title"]) > 30)} "'
+        return {"filename": None, "content": None, "message": message}
+
+
+def render_tsv(item):
+    """Render one row of publications.tsv."""
+    url_slug = item["url_slug"] if isinstance(item["url_slug"], str) else make_slug(item["title"])
+    md_filename = str(item["pub_date"]) + "-" + url_slug + ".md"
+    html_filename = str(item["pub_date"]) + "-" + url_slug
+    has_paper = len(str(item["paper_url"])) > 5
+    md = tsv_template.substitute(
+        title=item["title"],
+        html_filename=html_filename,
+        excerpt="\nexcerpt: '" + html_escape(item["excerpt"]) + "'" if len(str(item["excerpt"])) > 5 else "",
+        pub_date=item["pub_date"],
+        venue=html_escape(item["venue"]),
+        paperurl="\npaperurl: '" + item["paper_url"] + "'" if has_paper else "",
+        citation=html_escape(item["citation"]),
+        body="\n\n<a href='" + item["paper_url"] + "'>See the vignette here.</a>\n" if has_paper else "",
+    )
+    return {"filename": os.path.basename(md_filename), "content": md, "message": None}
+
+
+# ## Splitting sources into entries
+
+def split_bibtex(text):
+    """
+    Split bibtex source into (type, key, text) chunks without parsing fields.
+
+    An entry ends at the delimiter matching the one it opened with, "}" for
+    @x{...} and ")" for @x(...), outside any braces or quoted string; so a
+    ")" in a field like title={Smile :)} is just text. @comment blocks are
+    dropped; @string and @preamble blocks are returned with a key of None.
+    """
+    chunks = []
+    for match in re.finditer(r"@\s*([A-Za-z]+)\s*([{(])", text):
+        if chunks and match.start() < chunks[-1][3]:
+            continue
+        kind = match.group(1).lower()
+        close = "}" if match.group(2) == "{" else ")"
+        depth, quoted, i = 0, False, match.end()
+        while i < len(text):
+            char = text[i]
+            i += 1
+            if char == "{":
+                depth += 1
+            elif char == "}" and depth:
+                depth -= 1
+            elif depth == 0 and char == '"':
+                quoted = not quoted
+            elif depth == 0 and not quoted and char == close:
+                break
+        body = text[match.start():i]
+        key = None
+        if kind not in ("string", "preamble", "comment"):
+            key = text[match.end():i].split(",", 1)[0].strip()
+        chunks.append((kind, key, body, i))
+    return [(kind, key, body) for kind, key, body, _ in chunks if kind != "comment"]
+
+
+def bibtex_jobs(path, source):
+    """Entries of a .bib file as (bib_id, text to parse, entry hash)."""
+    with open(path, encoding="utf-8") as f:
+        chunks = split_bibtex(f.read())
+    macros = "\n".join(body for _, key, body in chunks if key is None)
+    settings = json.dumps(source, sort_keys=True)
+    return [
+        (key, macros + "\n" + body, _sha(macros + body + settings))
+        for _, key, body in chunks
+        if key is not None
+    ]
+
+
+def tsv_jobs(path):
+    """
+    Rows of a publications TSV as (row key, row dict, row hash).
+
+    A row is keyed by its page name, pub_date and url_slug, so adding or
+    removing a row leaves the other rows' keys alone. Rows sharing a page
+    name get "#2", "#3", ... in file order (they render to the same page,
+    and the last one wins, as before).
+    """
+    rows = pd.read_csv(path, sep="\t", header=0).to_dict("records")
+    jobs, seen = [], {}
+    for row in rows:
+        slug = row["url_slug"] if isinstance(row["url_slug"], str) else make_slug(row["title"])
+        key = f"{row['pub_date']}-{slug}"
+        seen[key] = seen.get(key, 0) + 1
+        if seen[key] > 1:
+            key += f"#{seen[key]}"
+        jobs.append((key, row, _sha(repr(sorted(row.items())))))
+    return jobs
+
+
+# ## Running the pipeline
+
+def _file_sha(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def run(sources, out_dir="../_publications/", manifest=".publications-manifest.json", cache_path=CACHE_PATH, workers=None):
+    """
+    Generate publication pages from bibtex and TSV sources.
+
+    Each source is a dict with a "file" and a "type" of "bibtex" or "tsv".
+    Bibtex sources also carry "venuekey", "venue-pretext" and "collection",
+    as in pubsFromBib.py.
+    """
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+    if cache.get("code") != CODE_VERSION:
+        cache = {"code": CODE_VERSION, "files": {}}
+
+    writer = IncrementalWriter(out_dir, manifest)
+    results, pending = {}, []
+    for source in sources:
+        path = source["file"]
+        file_sha = _file_sha(path)
+        cached = cache["files"].get(path, {})
+
+        # Unchanged file: every entry comes straight from the cache
+
+        if cached.get("sha") == file_sha:
+            results[path] = cached["entries"]
+            continue
+        if source["type"] == "bibtex":
+            jobs = [(key, (key, text, source), sha) for key, text, sha in bibtex_jobs(path, source)]
+            render = render_bibtex
+        else:
+            jobs = tsv_jobs(path)
+            render = render_tsv
+        entries = {}
+        for key, job, sha in jobs:
+            hit = cached.get("entries", {}).get(key)
+            entries[key] = hit if hit and hit["sha"] == sha else None
+            if entries[key] is None:
+                pending.append((path, key, sha, render, job))
+        results[path] = entries
+        cache["files"][path] = {"sha": file_sha, "entries": entries}
+
+    # Parse and render what changed, across a process pool when there is enough of it
+
+    if len(pending) > 32 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(render, job) for _, _, _, render, job in pending]
+            rendered = [future.result() for future in futures]
+    else:
+        rendered = [render(job) for _, _, _, render, job in pending]
+    for (path, key, sha, _, _), result in zip(pending, rendered):
+        results[path][key] = dict(result, sha=sha)
+        if result["message"]:
+            print(result["message"])
+
+    # Entries that render to the same filename overwrite each other; the last one wins
+
+    pages = {}
+    for source in sources:
+        for entry in results[source["file"]].values():
+            if entry["filename"]:
+                pages[entry["filename"]] = entry["content"]
+    for filename, content in pages.items():
+        writer.write(filename, content)
+
+    with open(cache_path, "w") as f:
+        json.dump(cache, f)
+    counts = writer.finish()
+    counts["reparsed"] = len(pending)
+    return counts
@@ -43,68 +43,58 @@ talks
 
 # In[4]:
 
-html_escape_table = {
-    "&": "&amp;",
-    '"': "&quot;",
-    "'": "&apos;"
-    }
+from string import Template
+
+import mdwriter
+from mdwriter import IncrementalWriter
 
 def html_escape(text):
     if type(text) is str:
-        return "".join(html_escape_table.get(c,c) for c in text)
+        return mdwriter.html_escape(text)
     else:
         return "False"
 
 
 # ## Creating the markdown files
 # 
-# This is where the heavy lifting is done. This loops through all the rows in the TSV dataframe, then starts to concatentate a big string (```md```) that contains the markdown for each type. It does the YAML metadata first, then does the description for the individual page.
+# This is where the heavy lifting is done. Each row of the TSV fills in a template compiled once up front: the YAML metadata first, then the description for the individual page.
+# 
+# Only files whose content changed are rewritten, and pages for rows that were removed from the TSV are deleted (see `mdwriter.py`).
 
 # In[5]:
 
-loc_dict = {}
+talk_template = Template(
+    "---\ntitle: \"$title\"\n"
+    "collection: talks\n"
+    "type: \"$type\"\n"
+    "permalink: /talks/$html_filename\n"
+    "$venue$date$location"
+    "---\n"
+    "$talk_url$description"
+)
 
-for row, item in talks.iterrows():
+writer = IncrementalWriter("../_talks/", ".talks-manifest.json")
+
+for item in talks.itertuples(index=False):
     
     md_filename = str(item.date) + "-" + item.url_slug + ".md"
     html_filename = str(item.date) + "-" + item.url_slug 
-    year = item.date[:4]
-    
-    md = "---\ntitle: \""   + item.title + '"\n'
-    md += "collection: talks" + "\n"
-    
-    if len(str(item.type)) > 3:
-        md += 'type: "' + item.type + '"\n'
-    else:
-        md += 'type: "Talk"\n'
-    
-    md += "permalink: /talks/" + html_filename + "\n"
-    
-    if len(str(item.venue)) > 3:
-        md += 'venue: "' + item.venue + '"\n'
-        
-    if len(str(item.location)) > 3:
-        md += "date: " + str(item.date) + "\n"
-    
-    if len(str(item.location)) > 3:
-        md += 'location: "' + str(item.location) + '"\n'
-           
-    md += "---\n"
-    
-    
-    if len(str(item.talk_url)) > 3:
-        md += "\n[More information here](" + item.talk_url + ")\n" 
-        
+    has_location = len(str(item.location)) > 3
     
-    if len(str(item.description)) > 3:
-        md += "\n" + html_escape(item.description) + "\n"
-        
+    md = talk_template.substitute(
+        title=item.title,
+        type=item.type if len(str(item.type)) > 3 else "Talk",
+        html_filename=html_filename,
+        venue='venue: "' + item.venue + '"\n' if len(str(item.venue)) > 3 else "",
+        date="date: " + str(item.date) + "\n" if has_location else "",
+        location='location: "' + str(item.location) + '"\n' if has_location else "",
+        talk_url="\n[More information here](" + item.talk_url + ")\n" if len(str(item.talk_url)) > 3 else "",
+        description="\n" + html_escape(item.description) + "\n" if len(str(item.description)) > 3 else "",
+    )
         
-    md_filename = os.path.basename(md_filename)
-    #print(md)
-    
-    with open("../_talks/" + md_filename, 'w') as f:
-        f.write(md)
+    writer.write(os.path.basename(md_filename), md)
+
+print(writer.finish())
 
 
 # These files are in the talks directory, one directory below where we're working from.
@@ -0,0 +1,223 @@
+# # Panel queries on SQLite or DuckDB
+#
+# Sqlscanner.sql builds a balanced store x day revenue panel from the
+# database sqlcase.py writes. SQLite runs it on one thread, row by row, which
+# takes minutes on the full 25M transaction / 85M line item database. This
+# module runs the same SQL on either engine:
+#
+#   * "sqlite": the database file itself, with DATE '...' literals rewritten
+#     (SQLite has none; ISO date strings compare the same way).
+#   * "duckdb": DuckDB, multi-threaded and columnar, over either the SQLite
+#     file (through DuckDB's sqlite extension) or a directory of Parquet files
+#     named after the tables, as written by `sqlite_to_parquet` or
+#     `sqlcase.write_parquet`.
+#
+# Results come back as a dict of NumPy columns (or an Arrow table from
+# DuckDB), and `check_parity` compares two results column by column.
+#
+#   python panelquery.py wholefoods_clean_final.sqlite --parquet parquet/ --repeat 3
+
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+QUERY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Sqlscanner.sql")
+
+TABLES = ("stores", "transactions", "line_items")
+
+
+def read_query(path=QUERY_PATH):
+    with open(path) as f:
+        return f.read()
+
+
+def sqlite_dialect(sql):
+    """SQLite has no DATE '...' literal; ISO date strings compare the same way."""
+    return sql.replace("DATE '", "'")
+
+
+def run_sqlite(db_path, sql):
+    """Run ``sql`` on a SQLite file; returns {column: NumPy array}."""
+    conn = sqlite3.connect(db_path)
+    try:
+        cur = conn.execute(sqlite_dialect(sql))
+        names = [d[0] for d in cur.description]
+        rows = cur.fetchall()
+    finally:
+        conn.close()
+    columns = list(zip(*rows)) if rows else [()] * len(names)
+    return {name: np.array(values) for name, values in zip(names, columns)}
+
+
+def _literal(path):
+    return "'" + path.replace("'", "''") + "'"
+
+
+def connect_duckdb(source, threads=None):
+    """
+    A DuckDB connection where the tables of ``source`` can be queried by name.
+
+    ``source`` is a SQLite file, attached read-only, or a directory holding
+    ``<table>.parquet`` files (or ``<table>/`` directories of them), exposed
+    as views.
+    """
+    import duckdb
+
+    con = duckdb.connect()
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    if os.path.isdir(source):
+        for name in os.listdir(source):
+            table, ext = os.path.splitext(name)
+            path = os.path.join(source, name)
+            if os.path.isdir(path):
+                path = os.path.join(path, "*.parquet")
+            elif ext != ".parquet":
+                continue
+            con.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet({_literal(path)})")
+    else:
+        # A no-op once the extension is installed; a fresh DuckDB downloads it
+        con.execute("INSTALL sqlite")
+        con.execute("LOAD sqlite")
+        con.execute(f"ATTACH {_literal(source)} AS src (TYPE sqlite, READ_ONLY)")
+        con.execute("USE src")
+    return con
+
+
+def run_duckdb(source, sql, threads=None, arrow=False):
+    """Run ``sql`` with DuckDB over ``source``; returns {column: NumPy array}, or an Arrow table."""
+    con = connect_duckdb(source, threads)
+    try:
+        result = con.execute(sql)
+        return result.fetch_arrow_table() if arrow else result.fetchnumpy()
+    finally:
+        con.close()
+
+
+ENGINES = {"sqlite": run_sqlite, "duckdb": run_duckdb}
+
+
+def run(source, sql=None, engine="duckdb"):
+    """Run ``sql`` (Sqlscanner.sql by default) on ``source`` with the named engine."""
+    return ENGINES[engine](source, read_query() if sql is None else sql)
+
+
+def sqlite_to_parquet(db_path, out_dir, tables=TABLES, batch_rows=1_000_000):
+    """
+    Copy tables of a SQLite file into ``out_dir/<table>.parquet``.
+
+    Reads ``batch_rows`` rows at a time, so memory stays flat however large
+    the database is. Columns declared DATE become Parquet dates.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(out_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        for table in tables:
+            info = conn.execute(f"PRAGMA table_info({table})").fetchall()
+            names = [row[1] for row in info]
+            dates = {row[1] for row in info if row[2].upper() == "DATE"}
+            cur = conn.execute(f"SELECT * FROM {table}")
+            path = os.path.join(out_dir, table + ".parquet")
+            writer = None
+            while True:
+                rows = cur.fetchmany(batch_rows)
+                if not rows:
+                    break
+                columns = {}
+                for name, values in zip(names, zip(*rows)):
+                    values = np.array(values)
+                    if name in dates:
+                        values = values.astype("datetime64[D]")
+                    columns[name] = values
+                batch = pa.RecordBatch.from_pydict(columns)
+                if writer is None:
+                    writer = pq.ParquetWriter(path + ".tmp", batch.schema)
+                writer.write_batch(batch)
+            if writer is not None:
+                writer.close()
+                os.replace(path + ".tmp", path)
+    finally:
+        conn.close()
+    return out_dir
+
+
+def _comparable(values):
+    values = np.asarray(values)
+    if values.dtype.kind == "M":
+        return values.astype("datetime64[D]")
+    if values.dtype.kind in "OU" and values.size and isinstance(values.flat[0], str):
+        try:
+            return values.astype("datetime64[D]")
+        except ValueError:
+            pass
+    return values
+
+
+def check_parity(expected, actual, rtol=1e-9):
+    """Differences between two results, as messages; an empty list means they agree."""
+    problems = []
+    if list(expected) != list(actual):
+        return [f"columns differ: {list(expected)} vs {list(actual)}"]
+    for name in expected:
+        a, b = _comparable(expected[name]), _comparable(actual[name])
+        if a.shape != b.shape:
+            problems.append(f"{name}: {a.shape[0]} rows vs {b.shape[0]}")
+        elif a.dtype.kind in "fiu" and b.dtype.kind in "fiu":
+            bad = ~np.isclose(a.astype(float), b.astype(float), rtol=rtol, atol=0)
+            if bad.any():
+                problems.append(f"{name}: {bad.sum()} values differ, first at row {np.argmax(bad)}")
+        else:
+            bad = a != b
+            if np.any(bad):
+                problems.append(f"{name}: {np.sum(bad)} values differ, first at row {np.argmax(bad)}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Sqlscanner.sql on SQLite and DuckDB and compare.")
+    parser.add_argument("db", help="SQLite database written by sqlcase.py.")
+    parser.add_argument("--parquet", help="Parquet directory for DuckDB; created from the database if missing.")
+    parser.add_argument("--query", default=QUERY_PATH)
+    parser.add_argument("--threads", type=int, help="DuckDB threads (default: all cores).")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--skip-sqlite", action="store_true", help="Time DuckDB only; no parity check.")
+    args = parser.parse_args()
+
+    sql = read_query(args.query)
+    source = args.db
+    if args.parquet:
+        if not os.path.isdir(args.parquet):
+            start = time.perf_counter()
+            sqlite_to_parquet(args.db, args.parquet)
+            print(f"parquet export: {time.perf_counter() - start:.2f}s")
+        source = args.parquet
+
+    def timed(label, func):
+        times, result = [], None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - start)
+        print(f"{label:<8} best {min(times):.2f}s over {args.repeat} run(s)")
+        return result
+
+    panel = timed("duckdb", lambda: run_duckdb(source, sql, args.threads))
+    if args.skip_sqlite:
+        return
+    reference = timed("sqlite", lambda: run_sqlite(args.db, sql))
+    problems = check_parity(reference, panel)
+    for problem in problems:
+        print("  " + problem)
+    print(f"parity: {'ok' if not problems else 'FAILED'} ({len(next(iter(reference.values())))} rows)")
+    if problems:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
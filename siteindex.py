@@ -0,0 +1,138 @@
+# # Front-matter index of the site's collections
+#
+# Reads the YAML header of every page in _talks/, _publications/, _posts/
+# and _portfolio/ once, and keeps the headers in .frontmatter-index.json
+# keyed by path, with each file's mtime and size. `update` re-reads only
+# files whose mtime or size changed and drops files that are gone, so tools
+# can ask for fields like location, date or venue without opening
+# unchanged pages. Only the header is read, never the body.
+#
+#     from siteindex import FrontMatterIndex
+#     index = FrontMatterIndex()
+#     index.update()
+#     for page in index.query("_talks", "location"):
+#         print(page["path"], page["location"])
+#
+# Values are kept as the strings written in the header (YAML's base loader),
+# so dates stay "2012-03-01" and nothing needs converting to store as JSON.
+
+import json
+import os
+
+import yaml
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+COLLECTIONS = ["_talks", "_publications", "_posts", "_portfolio"]
+INDEX_PATH = os.path.join(ROOT, ".frontmatter-index.json")
+EXTENSIONS = (".md", ".markdown", ".html")
+
+
+def read_front_matter(path):
+    """
+    Parse the YAML header between the leading "---" lines of a page.
+
+    Returns:
+        dict: Header fields, empty if the page has no header or it is not
+        valid YAML.
+    """
+    with open(path, encoding="utf-8") as f:
+        if f.readline().strip() != "---":
+            return {}
+        lines = []
+        for line in f:
+            if line.strip() == "---":
+                break
+            lines.append(line)
+        else:
+            return {}
+    try:
+        fields = yaml.load("".join(lines), Loader=yaml.BaseLoader)
+    except yaml.YAMLError as e:
+        print(f"Could not parse the front matter of {path}: {e}")
+        return {}
+    return fields if isinstance(fields, dict) else {}
+
+
+class FrontMatterIndex:
+    """
+    Front matter of every page in the collections, refreshed incrementally.
+
+    Args:
+        root (str): Site root holding the collection folders.
+        collections (list): Collection folders to index.
+        path (str): Where to keep the index.
+    """
+
+    def __init__(self, root=ROOT, collections=COLLECTIONS, path=INDEX_PATH):
+        self.root = root
+        self.collections = collections
+        self.path = path
+        self.files = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.files = json.load(f)
+
+    def update(self, save=True):
+        """
+        Re-read pages whose mtime or size changed and forget deleted ones.
+
+        Returns:
+            dict: Counts of pages read, unchanged and removed.
+        """
+        counts = {"read": 0, "unchanged": 0, "removed": 0}
+        seen = set()
+        for collection in self.collections:
+            folder = os.path.join(self.root, collection)
+            if not os.path.isdir(folder):
+                continue
+            for entry in os.scandir(folder):
+                if not entry.is_file() or not entry.name.endswith(EXTENSIONS):
+                    continue
+                key = f"{collection}/{entry.name}"
+                seen.add(key)
+                stat = entry.stat()
+                cached = self.files.get(key)
+                if cached and cached["mtime"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+                    counts["unchanged"] += 1
+                    continue
+                self.files[key] = {
+                    "mtime": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "fields": read_front_matter(entry.path),
+                }
+                counts["read"] += 1
+        for key in set(self.files) - seen:
+            del self.files[key]
+            counts["removed"] += 1
+        if save and (counts["read"] or counts["removed"]):
+            self.save()
+        return counts
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.files, f, separators=(",", ":"), sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def query(self, collection=None, *fields):
+        """
+        Pages of a collection (or all of them) that have every field asked for.
+
+        Args:
+            collection (str): e.g. "_talks", or None for every collection.
+            *fields (str): Fields a page must have; only these are returned.
+                With none, every field of each page is returned.
+
+        Returns:
+            list: Dicts with "path" (relative to the root) and the fields,
+            sorted by path.
+        """
+        pages = []
+        for key in sorted(self.files):
+            if collection is not None and not key.startswith(collection + "/"):
+                continue
+            page = self.files[key]["fields"]
+            if all(field in page for field in fields):
+                selected = {field: page[field] for field in fields} if fields else dict(page)
+                pages.append(dict(selected, path=key))
+        return pages
@@ -1,27 +1,48 @@
 # =============================================================================
 # WHOLEFOODS RETAIL SIMULATION – ULTRA-FAST & PYCHARM-FRIENDLY (15–22 min)
 # =============================================================================
-
+#
+# Run as a script to build the full database. The steps are also importable
+# (load_catalog, build_model, simulate, write_sqlite) so smaller runs,
+# such as the ones in benchmarks/, can drive them directly. simulate() yields
+# each chunk as NumPy record batches; the SQLite writer is one consumer.
+#
+# The built model is saved next to the database as model-<hash>.bin and
+# memory-mapped on the next run with the same inputs, seed and code, so only
+# the first run pays for the catalog and the model build. The Numba kernel
+# is compiled once and cached in __pycache__.
+
+import hashlib
+import inspect
+import json
 import os
 import sqlite3
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 from faker import Faker
 from tqdm import tqdm
 from numba import njit, prange
 
+try:
+    import pyarrow  # noqa: F401
+    _has_pyarrow = True
+except ImportError:
+    _has_pyarrow = False
+
 # -----------------------------
 # SETTINGS
 # -----------------------------
-np.random.seed(4552)
-fake = Faker('en_US')
+seed = 4552
 
 num_customers    = 840_000
 num_transactions = 25_200_000
 chunk_size       = 500_000
 output_dir       = r"C:\The Shop\LearnSQL"
 db_path          = os.path.join(output_dir, "wholefoods_clean_final.sqlite")
-os.makedirs(output_dir, exist_ok=True)
+sample_fraction  = 0.01
+sample_db_path   = os.path.join(output_dir, "wholefoods_sample.sqlite")
 
 product_files = [
     r"C:\The Shop\LearnSQL\wine-beer-spirits\wine-beer-spirits.csv",
@@ -32,144 +53,394 @@ product_files = [
 ]
 store_metadata_path = r"C:\The Shop\LearnSQL\storemetadata.csv"
 
+first_date = '2023-01-01'
+last_date  = '2025-12-31'
+
 k_factors = 5
 m_store_prod = 3
 price_noise_sigma = 0.02
 mu_noise_sigma = 0.25
 
-# -----------------------------
-# 1. Load stores & products
-# -----------------------------
-print("Loading stores & products...")
-stores = pd.read_csv(store_metadata_path)
-stores.columns = [c.strip().lower().replace(' ', '_') for c in stores.columns]
-stores = stores[['store_id', 'store_name', 'city', 'state', 'address', 'phone', 'url']]
-
-dfs = []
-for f in product_files:
-    df = pd.read_csv(f, low_memory=False)
-    df.columns = [c.strip().lower().replace(' ', '_') for c in df.columns]
-    if 'regular_price' in df.columns:
-        df.rename(columns={'regular_price': 'price'}, inplace=True)
-    want = [c for c in ['store_id', 'category', 'product_name', 'price', 'slug'] if c in df.columns]
-    df = df[want].dropna(subset=['slug'])
-    if 'price' in df.columns:
-        df['price'] = pd.to_numeric(df['price'], errors='coerce')
-    dfs.append(df.dropna(subset=['price']) if 'price' in df.columns else df)
-
-products_all = pd.concat(dfs, ignore_index=True)
-products = products_all[['slug', 'product_name', 'category']].drop_duplicates('slug').reset_index(drop=True)
-
-# FAST store → product index mapping (this was the killer before)
-print("Building fast store to product index mapping...")
-slug_to_idx = pd.Series(np.arange(len(products)), index=products['slug'])
-
-store_product_df = (
-    products_all[['store_id', 'slug']]
-    .merge(slug_to_idx.rename('product_idx'), left_on='slug', right_index=True, how='inner')
-)
-
-store_to_products = {
-    sid: group['product_idx'].values.astype(np.int32)
-    for sid, group in store_product_df.groupby('store_id', sort=False)
-}
+# False draws every line item on its own (simulate_line_items), as the script
+# always has. True draws each basket as distinct products, together per
+# transaction (simulate_baskets): faster, but a different dataset (basket
+# contents, line item counts and the random stream all change)
+distinct_baskets = False
 
-valid_store_ids = np.sort(np.fromiter(store_to_products.keys(), dtype=np.int64))
-store_to_idx = {sid: i for i, sid in enumerate(valid_store_ids)}
-num_stores = len(valid_store_ids)
-
-city_to_stores = stores.groupby('city')['store_id'].apply(list).to_dict()
+month_weights = np.array([0.07,0.07,0.08,0.08,0.13,0.16,0.08,0.08,0.08,0.08,0.11,0.11])
+month_weights /= month_weights.sum()
 
 # -----------------------------
-# 2. Customers
+# 1. Load stores & products
 # -----------------------------
-print("Generating customers...")
-city_state = stores[['city', 'state']].drop_duplicates()
-choices = np.random.choice(len(city_state), num_customers, replace=True)
-
-customers = pd.DataFrame({
-    'customer_id': range(1, num_customers + 1),
-    'city'       : city_state['city'].values[choices],
-    'state'      : city_state['state'].values[choices],
-    'email'      : [fake.email() if np.random.rand() > 0.05 else None for _ in range(num_customers)],
-    'phone'      : [fake.phone_number() if np.random.rand() > 0.1 else None for _ in range(num_customers)],
-    'credit_card': [fake.credit_card_number() if np.random.rand() > 0.2 else None for _ in range(num_customers)],
-})
-customers['annual_txns'] = np.random.poisson(18, num_customers) + 3
-customer_probs = customers['annual_txns'].values / customers['annual_txns'].sum()
-
-beta_i = np.random.normal(0.0, 0.7, size=num_customers).astype(np.float64)
-eta_i  = np.random.normal(0.0, 0.25, size=(num_customers, k_factors)).astype(np.float64)
+# Product files are read concurrently, each with explicit dtypes and (when
+# pyarrow is installed) pandas' multi-threaded pyarrow CSV engine. Slugs are
+# dictionary-encoded once over all files; the distinct products, their base
+# prices and the store → product CSR all come from those codes.
+PRODUCT_DTYPES = {
+    'store_id': 'Int64',
+    'category': 'string',
+    'product_name': 'string',
+    'price': 'float64',
+    'slug': 'string',
+}
 
-# -----------------------------
-# 3. Factor model & time setup
-# -----------------------------
-print("Preparing factor model...")
-unique_slugs = products['slug'].values
-slug_to_idx_dict = {s: i for i, s in enumerate(unique_slugs)}
-idx_to_slug_array = unique_slugs                      # direct array lookup – no dict!
-
-num_slugs = len(unique_slugs)
-
-# Base prices
-slug_base_price = np.zeros(num_slugs, dtype=np.float64)
-prices_by_slug = products_all.groupby('slug')['price'].first()
-for slug, price in prices_by_slug.items():
-    if slug in slug_to_idx_dict:
-        slug_base_price[slug_to_idx_dict[slug]] = price
-
-nonzero = slug_base_price[slug_base_price > 0]
-median_price = np.median(nonzero) if len(nonzero) > 0 else 5.0
-slug_base_price[slug_base_price == 0] = median_price
-
-alpha_p     = np.random.normal(0.0, 0.6, size=num_slugs).astype(np.float64)
-Lambda_p    = np.random.normal(0.0, 0.5, size=(num_slugs, k_factors)).astype(np.float64)
-kappa_p     = np.random.normal(0.0, 0.08, size=(num_slugs, k_factors)).astype(np.float64)
-store_embed = np.random.normal(0.0, 1.0, size=(num_stores, m_store_prod)).astype(np.float64)
-prod_embed  = np.random.normal(0.0, 1.0, size=(num_slugs, m_store_prod)).astype(np.float64)
-
-# Time matrix
-all_dates = pd.date_range('2023-01-01', '2025-12-31', freq='D')
-date_to_row = {d.date(): i for i, d in enumerate(all_dates)}
-
-F_mat = np.column_stack([
-    np.arange(len(all_dates)) / len(all_dates),
-    np.sin(2 * np.pi * np.arange(len(all_dates)) / 365.25),
-    np.cos(2 * np.pi * np.arange(len(all_dates)) / 365.25),
-    np.sin(2 * np.pi * np.arange(len(all_dates)) / 7.0),
-    np.cos(2 * np.pi * np.arange(len(all_dates)) / 30.44)
-]).astype(np.float64)
-
-dates_by_month = {m: all_dates[all_dates.month == m].values for m in range(1, 13)}
+Catalog = namedtuple('Catalog', [
+    'products',        # DataFrame: slug, product_name, category, one row per distinct slug
+    'base_price',      # float64 per product: its first listed price (NaN if never priced)
+    'store_ids',       # int64, sorted: stores that carry at least one product
+    'store_offsets',   # int64: products of store_ids[s] are product_idxs[store_offsets[s]:store_offsets[s + 1]]
+    'product_idxs',    # int32 rows of products, in file order within each store
+])
+
+
+def _normalize(column):
+    return column.strip().lower().replace(' ', '_')
+
+
+def read_product_file(path):
+    """One category CSV with normalized, typed columns; rows without a slug (or a valid price) dropped."""
+    header = pd.read_csv(path, nrows=0).columns
+    names = {}
+    for col in header:
+        name = _normalize(col)
+        names[col] = 'price' if name == 'regular_price' else name
+    usecols = [col for col in header if names[col] in PRODUCT_DTYPES]
+    dtype = {col: PRODUCT_DTYPES[names[col]] for col in usecols}
+    engine = 'pyarrow' if _has_pyarrow else 'c'
+    try:
+        df = pd.read_csv(path, usecols=usecols, dtype=dtype, engine=engine)
+    except (ValueError, TypeError):
+        # Prices with stray text: read them as strings and coerce, as before
+        dtype = {col: ('string' if t == 'float64' else t) for col, t in dtype.items()}
+        df = pd.read_csv(path, usecols=usecols, dtype=dtype, engine=engine)
+    df.columns = [names[col] for col in df.columns]
+    df = df.dropna(subset=['slug'])
+    if 'price' in df.columns:
+        df['price'] = pd.to_numeric(df['price'], errors='coerce')
+        df = df.dropna(subset=['price'])
+    return df
+
+
+def load_catalog(store_metadata_path, product_files, workers=None):
+    """Store metadata and the product catalog (see Catalog)."""
+    stores = pd.read_csv(store_metadata_path)
+    stores.columns = [_normalize(c) for c in stores.columns]
+    stores = stores[['store_id', 'store_name', 'city', 'state', 'address', 'phone', 'url']]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        frames = list(pool.map(read_product_file, product_files))
+
+    # Slugs encoded per file, then the files' distinct slugs encoded together;
+    # both keep first-appearance order, so products come out in file order.
+    # Each file contributes the first row of every slug it lists.
+    file_codes, firsts = [], []
+    for df in frames:
+        codes, uniques = pd.factorize(df['slug'])
+        first = np.flatnonzero(~pd.Series(codes).duplicated().to_numpy())
+        file_codes.append(codes)
+        firsts.append(pd.DataFrame({
+            'slug': uniques,
+            'product_name': df['product_name'].iloc[first].to_numpy() if 'product_name' in df else None,
+            'category': df['category'].iloc[first].to_numpy() if 'category' in df else None,
+            'price': df['price'].iloc[first].to_numpy(dtype=np.float64) if 'price' in df else np.nan,
+        }))
+    firsts = pd.concat(firsts, ignore_index=True)
+    global_codes, slugs = pd.factorize(firsts['slug'])
+
+    first = ~pd.Series(global_codes).duplicated().to_numpy()
+    products = firsts.loc[first, ['slug', 'product_name', 'category']].reset_index(drop=True)
+    base_price = np.full(len(slugs), np.nan)
+    priced = firsts['price'].notna().to_numpy()
+    first_priced = priced & ~pd.Series(np.where(priced, global_codes, -1)).duplicated().to_numpy()
+    base_price[global_codes[first_priced]] = firsts['price'].to_numpy()[first_priced]
+
+    # Store → product CSR, stores sorted, rows kept in file order
+    slug_codes, store_id, listed = [], [], []
+    offset = 0
+    for df, codes in zip(frames, file_codes):
+        slug_codes.append(global_codes[offset:][codes])
+        offset += codes.max() + 1 if len(codes) else 0
+        ids = df['store_id'] if 'store_id' in df else pd.Series(pd.NA, index=df.index, dtype='Int64')
+        store_id.append(ids.to_numpy(dtype=np.int64, na_value=0))
+        listed.append(ids.notna().to_numpy())
+    slug_codes, store_id = np.concatenate(slug_codes), np.concatenate(store_id)
+    listed = np.flatnonzero(np.concatenate(listed))
+    order = listed[np.argsort(store_id[listed], kind='stable')]
+    store_ids, counts = np.unique(store_id[order], return_counts=True)
+    store_offsets = np.zeros(len(store_ids) + 1, dtype=np.int64)
+    np.cumsum(counts, out=store_offsets[1:])
+    product_idxs = slug_codes[order].astype(np.int32)
+
+    return stores, Catalog(products, base_price, store_ids, store_offsets, product_idxs)
+
+
+def build_model(stores, catalog, num_customers=num_customers, fake=None):
+    """
+    Everything the main loop needs: customers, store/product indexes and the factor model.
+
+    Draws from NumPy's global generator, so seed it first for a repeatable run.
+    The generator's state afterwards is kept in the model, so a run from a
+    saved artifact continues exactly where a fresh build would.
+
+    Returns:
+        dict: NumPy arrays by name. Tables written to the database are kept
+        column by column under "customers/...", "stores/..." and
+        "products/...".
+    """
+    fake = fake or Faker('en_US')
+
+    products = catalog.products
+    valid_store_ids = catalog.store_ids
+    num_stores = len(valid_store_ids)
+    carried = set(valid_store_ids.tolist())
+
+    # City → stores that carry products, flattened the same way as store → products
+    city_to_stores = stores.groupby('city')['store_id'].apply(list).to_dict()
+    cities = list(city_to_stores)
+    city_store_lists = [[s for s in city_to_stores[c] if s in carried] for c in cities]
+    city_store_ids = np.array([s for group in city_store_lists for s in group], dtype=np.int64)
+    city_store_offsets = np.zeros(len(cities) + 1, dtype=np.int64)
+    city_store_offsets[1:] = np.cumsum([len(group) for group in city_store_lists])
+
+    # -----------------------------
+    # 2. Customers
+    # -----------------------------
+    city_state = stores[['city', 'state']].drop_duplicates()
+    choices = np.random.choice(len(city_state), num_customers, replace=True)
+
+    customers = pd.DataFrame({
+        'customer_id': range(1, num_customers + 1),
+        'city'       : city_state['city'].values[choices],
+        'state'      : city_state['state'].values[choices],
+        'email'      : [fake.email() if np.random.rand() > 0.05 else None for _ in range(num_customers)],
+        'phone'      : [fake.phone_number() if np.random.rand() > 0.1 else None for _ in range(num_customers)],
+        'credit_card': [fake.credit_card_number() if np.random.rand() > 0.2 else None for _ in range(num_customers)],
+    })
+    customers['annual_txns'] = np.random.poisson(18, num_customers) + 3
+    customer_probs = customers['annual_txns'].values / customers['annual_txns'].sum()
+    customer_city = pd.Index(cities).get_indexer(customers['city']).astype(np.int32)
+
+    beta_i = np.random.normal(0.0, 0.7, size=num_customers).astype(np.float64)
+    eta_i  = np.random.normal(0.0, 0.25, size=(num_customers, k_factors)).astype(np.float64)
+
+    # -----------------------------
+    # 3. Factor model & time setup
+    # -----------------------------
+    num_slugs = len(products)
+
+    # Base prices
+    slug_base_price = catalog.base_price.astype(np.float64)  # a copy
+
+    nonzero = slug_base_price[slug_base_price > 0]
+    median_price = np.median(nonzero) if len(nonzero) > 0 else 5.0
+    slug_base_price[slug_base_price == 0] = median_price
+
+    alpha_p     = np.random.normal(0.0, 0.6, size=num_slugs).astype(np.float64)
+    Lambda_p    = np.random.normal(0.0, 0.5, size=(num_slugs, k_factors)).astype(np.float64)
+    kappa_p     = np.random.normal(0.0, 0.08, size=(num_slugs, k_factors)).astype(np.float64)
+    store_embed = np.random.normal(0.0, 1.0, size=(num_stores, m_store_prod)).astype(np.float64)
+    prod_embed  = np.random.normal(0.0, 1.0, size=(num_slugs, m_store_prod)).astype(np.float64)
+
+    # Time matrix
+    all_dates = pd.date_range(first_date, last_date, freq='D')
+
+    F_mat = np.column_stack([
+        np.arange(len(all_dates)) / len(all_dates),
+        np.sin(2 * np.pi * np.arange(len(all_dates)) / 365.25),
+        np.cos(2 * np.pi * np.arange(len(all_dates)) / 365.25),
+        np.sin(2 * np.pi * np.arange(len(all_dates)) / 7.0),
+        np.cos(2 * np.pi * np.arange(len(all_dates)) / 30.44)
+    ]).astype(np.float64)
+
+    # Day rows of each month, flattened
+    month_days = np.concatenate([np.flatnonzero(all_dates.month == m) for m in range(1, 13)]).astype(np.int32)
+    month_offsets = np.zeros(13, dtype=np.int64)
+    month_offsets[1:] = np.cumsum([(all_dates.month == m).sum() for m in range(1, 13)])
+
+    # -----------------------------
+    # 4. Flattened store to product arrays for Numba
+    # -----------------------------
+    flat_slug_idxs = catalog.product_idxs
+    store_offsets = catalog.store_offsets
+
+    _, rng_keys, rng_pos, has_gauss, cached_gaussian = np.random.get_state()
+
+    model = {
+        'customer_probs': customer_probs,
+        'customer_city': customer_city,
+        'beta_i': beta_i,
+        'eta_i': eta_i,
+        'valid_store_ids': valid_store_ids,
+        'city_store_ids': city_store_ids,
+        'city_store_offsets': city_store_offsets,
+        'slug_base_price': slug_base_price,
+        'alpha_p': alpha_p,
+        'Lambda_p': Lambda_p,
+        'kappa_p': kappa_p,
+        'store_embed': store_embed,
+        'prod_embed': prod_embed,
+        'F_mat': F_mat,
+        'month_days': month_days,
+        'month_offsets': month_offsets,
+        'flat_slug_idxs': flat_slug_idxs,
+        'store_offsets': store_offsets,
+        'rng_keys': rng_keys,
+        'rng_extra': np.array([rng_pos, has_gauss, cached_gaussian], dtype=np.float64),
+    }
+    for name, table in (('customers', customers), ('stores', stores), ('products', products)):
+        model.update(_table_arrays(name, table))
+    return _with_lookups(model)
+
+
+def restore_rng(model):
+    """Put NumPy's global generator back where it was when the model was built."""
+    pos, has_gauss, cached_gaussian = model['rng_extra']
+    np.random.set_state(('MT19937', np.array(model['rng_keys']), int(pos), int(has_gauss), float(cached_gaussian)))
 
-# -----------------------------
-# 4. Flattened store to product arrays for Numba
-# -----------------------------
-flat_slug_idxs = np.concatenate([store_to_products[sid] for sid in valid_store_ids], dtype=np.int32)
-store_offsets = np.zeros(num_stores + 1, dtype=np.int64)
-store_offsets[1:] = np.cumsum([len(store_to_products[sid]) for sid in valid_store_ids])
 
 # -----------------------------
-# 5. DB setup
+# 5. Model artifact
 # -----------------------------
-print("Initializing SQLite database...")
-conn = sqlite3.connect(db_path)
-conn.executescript("""
-    PRAGMA journal_mode = WAL;
-    PRAGMA synchronous = NORMAL;
-    PRAGMA cache_size = -64000;
-    PRAGMA temp_store = MEMORY;
-""")
-
-# These three tables are small → safe without method='multi'
-customers.to_sql('customers',   conn, if_exists='replace', index=False, chunksize=100_000)
-stores.to_sql(   'stores',      conn, if_exists='replace', index=False, chunksize=100_000)
-products.to_sql( 'products',    conn, if_exists='replace', index=False, chunksize=100_000)
+# Every array of the model in one file: a JSON header giving each array's
+# dtype, shape and offset, then the raw arrays, 64-byte aligned. Loading maps
+# the file and hands out read-only views, so repeat runs skip the catalog and
+# the model build, and worker processes share the pages instead of copying.
+
+ARTIFACT_MAGIC = b"SQLCASE\x01"
+
+
+def _table_arrays(name, table):
+    """A DataFrame as arrays: numbers as they are, text as UTF-8 bytes plus a null mask."""
+    arrays = {}
+    for col in table.columns:
+        values = table[col]
+        if pd.api.types.is_numeric_dtype(values):
+            arrays[f'{name}/{col}'] = values.to_numpy()
+            continue
+        null = values.isna().to_numpy()
+        arrays[f'{name}/{col}'] = np.array(
+            [b'' if n else str(v).encode('utf-8') for v, n in zip(values, null)], dtype=bytes
+        )
+        arrays[f'{name}/{col}@null'] = null
+    return arrays
+
+
+def _decode(values, null):
+    text = np.char.decode(values, 'utf-8').astype(object)
+    text[null] = None
+    return text
+
+
+def model_table(model, name):
+    """Rebuild one of the tables kept in the model as a DataFrame."""
+    prefix = name + '/'
+    columns = {}
+    for key, values in model.items():
+        if not key.startswith(prefix) or key.endswith('@null'):
+            continue
+        if values.dtype.kind == 'S':
+            values = _decode(values, model[key + '@null'])
+        columns[key[len(prefix):]] = values
+    return pd.DataFrame(columns)
+
+
+def _with_lookups(model):
+    """Add the Python-object lookups the main loop uses; these are not saved."""
+    model['slug_names'] = _decode(model['products/slug'], model['products/slug@null'])
+    model['dates'] = np.arange(np.datetime64(first_date), np.datetime64(last_date) + 1)
+    return model
+
+
+def _align(n):
+    return -(-n // 64) * 64
+
+
+def save_artifact(model, path, key=''):
+    """Write every saved array of the model to ``path`` (atomically)."""
+    arrays = {
+        name: np.ascontiguousarray(values)
+        for name, values in model.items()
+        if isinstance(values, np.ndarray) and values.dtype != object
+    }
+    header = {'key': key, 'arrays': {}}
+    offset = 0
+    for name, values in arrays.items():
+        offset = _align(offset)
+        header['arrays'][name] = {'dtype': values.dtype.str, 'shape': list(values.shape), 'offset': offset}
+        offset += values.nbytes
+    blob = json.dumps(header).encode()
+    start = _align(len(ARTIFACT_MAGIC) + 8 + len(blob))
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(ARTIFACT_MAGIC + len(blob).to_bytes(8, 'little') + blob)
+        for name, values in arrays.items():
+            f.seek(start + header['arrays'][name]['offset'])
+            f.write(values.tobytes())
+        f.truncate(start + offset)
+    os.replace(tmp, path)
+
+
+def load_artifact(path):
+    """Map a saved model; arrays are read-only views into the file."""
+    with open(path, 'rb') as f:
+        if f.read(len(ARTIFACT_MAGIC)) != ARTIFACT_MAGIC:
+            raise ValueError(f"{path} is not a sqlcase model artifact")
+        size = int.from_bytes(f.read(8), 'little')
+        header = json.loads(f.read(size))
+    start = _align(len(ARTIFACT_MAGIC) + 8 + size)
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    model = {}
+    for name, spec in header['arrays'].items():
+        shape = tuple(spec['shape'])
+        model[name] = np.frombuffer(
+            buffer, dtype=np.dtype(spec['dtype']), count=int(np.prod(shape)), offset=start + spec['offset']
+        ).reshape(shape)
+    return _with_lookups(model)
+
+
+def artifact_key(store_metadata_path, product_files, seed=seed, num_customers=num_customers):
+    """Hash of everything the model depends on: input files, seed, settings and the build code."""
+    h = hashlib.sha256()
+    for func in (read_product_file, load_catalog):
+        h.update(inspect.getsource(func).encode())
+    h.update(inspect.getsource(build_model).encode())
+    h.update(repr((seed, num_customers, k_factors, m_store_prod, first_date, last_date)).encode())
+    for path in [store_metadata_path, *product_files]:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+    return h.hexdigest()
+
+
+def load_or_build_model(store_metadata_path, product_files, num_customers=num_customers,
+                        seed=seed, artifact_dir=None):
+    """
+    The model for these inputs, from its artifact when one exists.
+
+    Without ``artifact_dir`` the model is always built. Otherwise it is
+    loaded from ``model-<key>.bin`` there, or built and saved under that name.
+    """
+    path = None
+    if artifact_dir is not None:
+        key = artifact_key(store_metadata_path, product_files, seed, num_customers)
+        path = os.path.join(artifact_dir, f'model-{key[:16]}.bin')
+        if os.path.exists(path):
+            return load_artifact(path)
+
+    np.random.seed(seed)
+    stores, catalog = load_catalog(store_metadata_path, product_files)
+    model = build_model(stores, catalog, num_customers)
+    if path is not None:
+        os.makedirs(artifact_dir, exist_ok=True)
+        save_artifact(model, path, key)
+    return model
 
 # -----------------------------
 # 6. Numba kernel
 # -----------------------------
-@njit(parallel=True)
+@njit(parallel=True, cache=True)
 def simulate_line_items(tx_ids, cust_ids, store_idxs, day_idxs,
                         alpha_p, beta_i, Lambda_p, eta_i,
                         store_embed, prod_embed,
@@ -225,92 +496,371 @@ def simulate_line_items(tx_ids, cust_ids, store_idxs, day_idxs,
 
     return slug_out, qty_out, price_out
 
+
+@njit(parallel=True, cache=True)
+def simulate_baskets(cust_ids, store_idxs, day_idxs, sizes, item_offsets,
+                     alpha_p, beta_i, Lambda_p, eta_i,
+                     store_embed, prod_embed,
+                     slug_base_price, kappa_p,
+                     mu_noise_sigma, price_noise_sigma,
+                     F_mat,
+                     flat_slug_idxs, store_offsets):
+    """
+    Whole baskets: ``sizes[t]`` distinct products for transaction ``t``.
+
+    The store's candidate scores are computed once per transaction and the
+    basket is their Gumbel-top-k: perturb each score with Gumbel noise and
+    keep the k largest, which samples k products without replacement in
+    proportion to the softmax. Line items of transaction ``t`` go to
+    ``item_offsets[t]:item_offsets[t + 1]``.
+    """
+    n_items = item_offsets[-1]
+    slug_out  = np.empty(n_items, dtype=np.int32)
+    qty_out   = np.empty(n_items, dtype=np.int32)
+    price_out = np.empty(n_items, dtype=np.float32)
+    k_f = F_mat.shape[1]
+    m_e = store_embed.shape[1]
+
+    for t in prange(len(sizes)):
+        sidx = store_idxs[t]
+        cust = cust_ids[t]
+        f_t  = F_mat[day_idxs[t]]
+        k    = sizes[t]
+
+        start = store_offsets[sidx]
+        end   = store_offsets[sidx + 1]
+        candidates = flat_slug_idxs[start:end]
+        if candidates.size == 0:
+            candidates = np.array([0], dtype=np.int32)
+
+        # Top k of score + Gumbel noise, kept sorted in best_key/best_slug
+        best_key  = np.full(k, -np.inf)
+        best_slug = np.zeros(k, dtype=np.int32)
+        for j in range(candidates.size):
+            c = candidates[j]
+            score = alpha_p[c]
+            for f in range(k_f):
+                score += Lambda_p[c, f] * f_t[f]
+            for e in range(m_e):
+                score += store_embed[sidx, e] * prod_embed[c, e]
+            key = score - np.log(-np.log(np.random.random()))
+            if key <= best_key[k - 1]:
+                continue
+            pos = k - 1
+            while pos > 0 and best_key[pos - 1] < key:
+                best_key[pos]  = best_key[pos - 1]
+                best_slug[pos] = best_slug[pos - 1]
+                pos -= 1
+            best_key[pos]  = key
+            best_slug[pos] = c
+
+        base = item_offsets[t]
+        for j in range(k):
+            chosen = best_slug[j]
+            slug_out[base + j] = chosen
+
+            mu = (alpha_p[chosen] + beta_i[cust] +
+                  np.dot(Lambda_p[chosen], f_t) + np.dot(eta_i[cust], f_t) +
+                  np.random.normal(0.0, mu_noise_sigma))
+            qty = 1 + np.random.poisson(np.exp(mu / 3.0))
+            qty_out[base + j] = max(qty, 1)
+
+            season = np.dot(kappa_p[chosen], f_t)
+            bias   = np.dot(store_embed[sidx], prod_embed[chosen]) * 0.15
+            noise  = np.random.normal(0.0, price_noise_sigma)
+            price_out[base + j] = slug_base_price[chosen] * np.exp(season + bias + noise)
+
+    return slug_out, qty_out, price_out
+
 # -----------------------------
-# 7. MAIN LOOP (SQLite-safe)
+# 7. One chunk of transactions
 # -----------------------------
-print("Starting 25.2 million transactions – ~15–22 min total...")
-month_weights = np.array([0.07,0.07,0.08,0.08,0.13,0.16,0.08,0.08,0.08,0.08,0.11,0.11])
-month_weights /= month_weights.sum()
+# A chunk is a pair of record batches, one for transactions and one for
+# line items, each a dict of NumPy columns with these dtypes. Line items
+# carry the product as its row in the products table; model['slug_names']
+# (or record_batches) turns it back into the slug.
+TRANSACTION_SCHEMA = {
+    'transaction_id': np.dtype(np.int64),
+    'customer_id'   : np.dtype(np.int64),
+    'store_id'      : np.dtype(np.int64),
+    'sale_date'     : np.dtype('datetime64[D]'),
+}
+LINE_ITEM_SCHEMA = {
+    'transaction_id': np.dtype(np.int64),
+    'product_idx'   : np.dtype(np.int32),
+    'quantity'      : np.dtype(np.int32),
+    'price'         : np.dtype(np.float32),
+    'sale_date'     : np.dtype('datetime64[D]'),
+}
+
 
-tx_id = 1
-pbar = tqdm(total=num_transactions, desc="Tx", unit="tx")
+def simulate_chunk(model, tx_id, sz, distinct=distinct_baskets):
+    """
+    Transactions ``tx_id .. tx_id + sz - 1`` and their line items, as two record batches.
 
-for start in range(0, num_transactions, chunk_size):
-    sz = min(chunk_size, num_transactions - start)
+    With ``distinct``, a basket never repeats a product, so it is capped at
+    the number of products its store carries.
+    """
+    customer_city = model['customer_city']
+    city_store_ids = model['city_store_ids']
+    city_store_offsets = model['city_store_offsets']
 
     # Customers
-    cust_idx = np.random.choice(len(customers), sz, p=customer_probs)
-    chosen = customers.iloc[cust_idx].reset_index(drop=True)
+    cust_idx = np.random.choice(len(customer_city), sz, p=model['customer_probs'])
 
-    # Dates
+    # Dates, as rows of F_mat
     months = np.random.choice(np.arange(1,13), sz, p=month_weights)
-    sale_dates = np.concatenate([
-        np.random.choice(dates_by_month[m], size=(months == m).sum(), replace=True)
+    month_days, month_offsets = model['month_days'], model['month_offsets']
+    day_indices = np.concatenate([
+        np.random.choice(month_days[month_offsets[m-1]:month_offsets[m]], size=(months == m).sum(), replace=True)
         for m in range(1,13)
-    ])
-    sale_dates_py = sale_dates.astype('datetime64[D]').astype(object)
-    day_indices = np.frompyfunc(date_to_row.__getitem__, 1, 1)(sale_dates_py).astype(np.int32)
+    ]).astype(np.int32)
+    sale_dates = model['dates'][day_indices]
 
     # Stores with local bias
-    store_ids_chunk = np.random.choice(valid_store_ids, sz)
+    store_ids_chunk = np.random.choice(model['valid_store_ids'], sz)
     local = np.random.rand(sz) < 0.82
     for i in np.where(local)[0]:
-        city = chosen.loc[i, 'city']
-        candidates = [s for s in city_to_stores.get(city, []) if s in store_to_idx]
-        if candidates:
-            store_ids_chunk[i] = np.random.choice(candidates)
-    store_rep_idx = np.array([store_to_idx[s] for s in store_ids_chunk], dtype=np.int32)
-
-    # -------------------------
-    # Transactions table insert
-    # -------------------------
-    tx_chunk = pd.DataFrame({
-        'transaction_id': range(tx_id, tx_id + sz),
-        'customer_id'   : chosen['customer_id'].values,
-        'store_id'      : store_ids_chunk,
-        'sale_date'     : sale_dates_py
-    })
-
-    # IMPORTANT: NO method='multi'
-    tx_chunk.to_sql('transactions', conn, if_exists='append',
-                    index=False, chunksize=50_000)
+        city = customer_city[cust_idx[i]]
+        lo, hi = city_store_offsets[city], city_store_offsets[city + 1]
+        if hi > lo:
+            store_ids_chunk[i] = np.random.choice(city_store_ids[lo:hi])
+    store_rep_idx = np.searchsorted(model['valid_store_ids'], store_ids_chunk).astype(np.int32)
+
+    transactions = {
+        'transaction_id': np.arange(tx_id, tx_id + sz, dtype=np.int64),
+        'customer_id'   : (cust_idx + 1).astype(np.int64),
+        'store_id'      : store_ids_chunk.astype(np.int64),
+        'sale_date'     : sale_dates,
+    }
 
-    # -------------------------
     # Line items
-    # -------------------------
     baskets   = np.clip(np.random.poisson(2.4, sz) + 1, 1, 30)
-    tx_rep    = np.repeat(tx_chunk['transaction_id'].values, baskets)
-    store_rep = np.repeat(store_rep_idx, baskets)
-    day_rep   = np.repeat(day_indices, baskets)
-    cust_rep  = np.repeat(cust_idx, baskets)
-
-    slugs_idx, quantities, prices = simulate_line_items(
-        tx_rep, cust_rep, store_rep, day_rep,
-        alpha_p, beta_i, Lambda_p, eta_i,
-        store_embed, prod_embed,
-        slug_base_price, kappa_p,
+    factors = (
+        model['alpha_p'], model['beta_i'], model['Lambda_p'], model['eta_i'],
+        model['store_embed'], model['prod_embed'],
+        model['slug_base_price'], model['kappa_p'],
         mu_noise_sigma, price_noise_sigma,
-        F_mat,
-        flat_slug_idxs, store_offsets
+        model['F_mat'],
+        model['flat_slug_idxs'], model['store_offsets']
     )
-
-    li_chunk = pd.DataFrame({
+    if distinct:
+        carried = np.maximum(np.diff(model['store_offsets'])[store_rep_idx], 1)
+        baskets = np.minimum(baskets, carried)
+        item_offsets = np.zeros(sz + 1, dtype=np.int64)
+        np.cumsum(baskets, out=item_offsets[1:])
+        slugs_idx, quantities, prices = simulate_baskets(
+            cust_idx, store_rep_idx, day_indices, baskets.astype(np.int64), item_offsets, *factors
+        )
+        tx_rep = np.repeat(transactions['transaction_id'], baskets)
+    else:
+        tx_rep    = np.repeat(transactions['transaction_id'], baskets)
+        store_rep = np.repeat(store_rep_idx, baskets)
+        day_rep   = np.repeat(day_indices, baskets)
+        cust_rep  = np.repeat(cust_idx, baskets)
+        slugs_idx, quantities, prices = simulate_line_items(tx_rep, cust_rep, store_rep, day_rep, *factors)
+
+    line_items = {
         'transaction_id': tx_rep,
-        'slug': idx_to_slug_array[slugs_idx],
-        'quantity': quantities,
-        'price': np.round(prices, 2),
-        'sale_date': np.repeat(sale_dates_py, baskets)
-    })
-
-    li_chunk.to_sql('line_items', conn, if_exists='append',
-                    index=False, chunksize=50_000)
+        'product_idx'   : slugs_idx,
+        'quantity'      : quantities,
+        'price'         : np.round(prices, 2),
+        'sale_date'     : np.repeat(sale_dates, baskets),
+    }
+    return transactions, line_items
+
+
+def simulate(model, num_transactions, chunk_size=chunk_size, first_id=1, distinct=distinct_baskets):
+    """
+    Stream the simulation: yields ``(transactions, line_items)`` per chunk.
+
+    Only one chunk is in memory at a time, so tests, benchmarks and other
+    sinks can consume any number of transactions without going through a
+    database. Chunks draw from NumPy's global generator in order; a
+    consumer that draws from it too changes the chunks that follow.
+    """
+    for start in range(0, num_transactions, chunk_size):
+        sz = min(chunk_size, num_transactions - start)
+        yield simulate_chunk(model, first_id + start, sz, distinct)
+
+
+def record_batches(model, chunk):
+    """One chunk as two ``pyarrow.RecordBatch``, with the slug dictionary-encoded."""
+    import pyarrow as pa
+
+    transactions, line_items = chunk
+    items = dict(line_items)
+    items['product_idx'] = pa.DictionaryArray.from_arrays(items['product_idx'], pa.array(model['slug_names']))
+    items['slug'] = items.pop('product_idx')
+    return pa.RecordBatch.from_pydict(transactions), pa.RecordBatch.from_pydict(items)
 
-    tx_id += sz
-    pbar.update(sz)
+# -----------------------------
+# 8. SQLite output
+# -----------------------------
+def write_sqlite(model, db_path, num_transactions, chunk_size=chunk_size, progress=True):
+    """Write the small tables, then the transactions and line items chunk by chunk."""
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        PRAGMA journal_mode = WAL;
+        PRAGMA synchronous = NORMAL;
+        PRAGMA cache_size = -64000;
+        PRAGMA temp_store = MEMORY;
+    """)
+
+    # These three tables are small → safe without method='multi'
+    for name in ('customers', 'stores', 'products'):
+        model_table(model, name).to_sql(name, conn, if_exists='replace', index=False, chunksize=100_000)
+
+    pbar = tqdm(total=num_transactions, desc="Tx", unit="tx", disable=not progress)
+
+    for transactions, line_items in simulate(model, num_transactions, chunk_size):
+        # Dates go in as datetime.date so the columns stay DATE 'YYYY-MM-DD'
+        tx_chunk = pd.DataFrame(transactions)
+        tx_chunk['sale_date'] = transactions['sale_date'].astype(object)
+        li_chunk = pd.DataFrame({
+            'transaction_id': line_items['transaction_id'],
+            'slug': model['slug_names'][line_items['product_idx']],
+            'quantity': line_items['quantity'],
+            'price': line_items['price'],
+            'sale_date': line_items['sale_date'].astype(object),
+        })
+
+        # IMPORTANT: NO method='multi'
+        tx_chunk.to_sql('transactions', conn, if_exists='append',
+                        index=False, chunksize=50_000)
+        li_chunk.to_sql('line_items', conn, if_exists='append',
+                        index=False, chunksize=50_000)
+
+        pbar.update(len(tx_chunk))
+
+    pbar.close()
+    conn.close()
+
+
+def write_parquet(model, out_dir, num_transactions, chunk_size=chunk_size, progress=True):
+    """
+    The same tables as write_sqlite, as ``out_dir/<table>.parquet``.
+
+    Transactions and line items get one row group per chunk. Prices are
+    written as doubles, as SQLite stores them, so panel queries agree with
+    the database to the last digit (see panelquery.py).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name in ('customers', 'stores', 'products'):
+        model_table(model, name).to_parquet(os.path.join(out_dir, name + '.parquet'), index=False)
+
+    writers = {}
+    pbar = tqdm(total=num_transactions, desc="Tx", unit="tx", disable=not progress)
+    for chunk in simulate(model, num_transactions, chunk_size):
+        tx_batch, li_batch = record_batches(model, chunk)
+        li_batch = li_batch.set_column(
+            li_batch.schema.get_field_index('price'), 'price', li_batch.column('price').cast(pa.float64())
+        )
+        for name, batch in (('transactions', tx_batch), ('line_items', li_batch)):
+            if name not in writers:
+                writers[name] = pq.ParquetWriter(os.path.join(out_dir, name + '.parquet'), batch.schema)
+            writers[name].write_batch(batch)
+        pbar.update(tx_batch.num_rows)
+    for writer in writers.values():
+        writer.close()
+    pbar.close()
 
-pbar.close()
-conn.close()
 
-print(f"\nSUCCESS! Database saved to:\n   {db_path}")
-print(f"   • {num_transactions:,} transactions")
-print(f"   • ~{int(num_transactions * 3.4):,} line items")
+# -----------------------------
+# 9. Stratified sample database
+# -----------------------------
+def write_sample(db_path, sample_path, fraction=sample_fraction, seed=seed):
+    """
+    A small copy of the database for exploratory queries.
+
+    From every store × month stratum, ``max(1, round(n * fraction))`` of its
+    ``n`` transactions are kept, with all of their line items and customers.
+    Stores and products are copied whole. Each sampled transaction has a
+    ``weight`` column, n over the number kept from its stratum, and the
+    ``strata`` table lists every stratum with its counts. Multiply
+    transaction-level sums by ``weight`` (e.g. ``SUM(l.price * l.quantity * t.weight)``
+    in Sqlscanner.sql) to estimate full-data totals.
+
+    Which transactions are kept depends only on ``seed``: they are ranked
+    within their stratum by a seeded permutation of transaction_id.
+    """
+    if os.path.exists(sample_path):
+        os.remove(sample_path)
+    rng = np.random.default_rng(seed)
+    modulus = 2_147_483_647  # prime, so (id * a + b) % modulus permutes the ids
+    a, b = (int(x) for x in rng.integers(1, modulus, 2))
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("ATTACH DATABASE ? AS sample", (sample_path,))
+    schema = dict(conn.execute("SELECT name, sql FROM main.sqlite_master WHERE type = 'table'"))
+    for name in ('customers', 'stores', 'products', 'transactions', 'line_items'):
+        conn.execute(schema[name].replace('CREATE TABLE "', 'CREATE TABLE sample."', 1)
+                                 .replace(f'CREATE TABLE {name}', f'CREATE TABLE sample.{name}', 1))
+    conn.executescript(f"""
+        ALTER TABLE sample.transactions ADD COLUMN weight REAL;
+
+        CREATE TABLE sample.strata AS
+        SELECT store_id, substr(sale_date, 1, 7) AS month,
+               COUNT(*) AS n_transactions,
+               MAX(1, CAST(ROUND(COUNT(*) * {float(fraction)}) AS INTEGER)) AS n_sampled
+        FROM main.transactions
+        GROUP BY 1, 2;
+
+        INSERT INTO sample.transactions
+        SELECT transaction_id, customer_id, store_id, sale_date, weight
+        FROM (
+            SELECT t.*,
+                   s.n_transactions * 1.0 / s.n_sampled AS weight,
+                   s.n_sampled,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY t.store_id, substr(t.sale_date, 1, 7)
+                       ORDER BY (t.transaction_id * {a} + {b}) % {modulus}
+                   ) AS rank
+            FROM main.transactions t
+            JOIN sample.strata s
+              ON s.store_id = t.store_id AND s.month = substr(t.sale_date, 1, 7)
+        )
+        WHERE rank <= n_sampled;
+
+        CREATE UNIQUE INDEX sample.transactions_id ON transactions(transaction_id);
+
+        INSERT INTO sample.line_items
+        SELECT l.* FROM main.line_items l
+        WHERE l.transaction_id IN (SELECT transaction_id FROM sample.transactions);
+
+        INSERT INTO sample.customers
+        SELECT c.* FROM main.customers c
+        WHERE c.customer_id IN (SELECT customer_id FROM sample.transactions);
+
+        INSERT INTO sample.stores SELECT * FROM main.stores;
+        INSERT INTO sample.products SELECT * FROM main.products;
+    """)
+    conn.commit()
+    conn.execute("DETACH DATABASE sample")
+    conn.close()
+
+
+def main():
+    os.makedirs(output_dir, exist_ok=True)
+
+    print("Loading the model (stores, products, customers, factors)...")
+    model = load_or_build_model(store_metadata_path, product_files, num_customers, seed, artifact_dir=output_dir)
+    restore_rng(model)
+
+    print("Starting 25.2 million transactions – ~15–22 min total...")
+    write_sqlite(model, db_path, num_transactions, chunk_size)
+
+    print(f"\nSUCCESS! Database saved to:\n   {db_path}")
+    print(f"   • {num_transactions:,} transactions")
+    print(f"   • ~{int(num_transactions * 3.4):,} line items")
+
+    print(f"Writing a {sample_fraction:.0%} store × month sample...")
+    write_sample(db_path, sample_db_path, sample_fraction, seed)
+    print(f"   {sample_db_path}")
+
+
+if __name__ == "__main__":
+    main()
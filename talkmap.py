@@ -5,38 +5,33 @@
 # (c) 2016-2017 R. Stuart Geiger, released under the MIT license
 #
 # Run this from the _talks/ directory, which contains .md files of all your talks. 
-# This scrapes the location YAML field from each .md file, geolocates it with
-# geopy/Nominatim, and uses the getorg library to output data, HTML,
-# and Javascript for a standalone cluster map.
+# This takes the location YAML field of each talk from the front-matter
+# index (see siteindex.py, which only re-reads talks that changed),
+# geolocates it with geopy/Nominatim, and uses the getorg library to output
+# data, HTML, and Javascript for a standalone cluster map.
 #
-# Requires: glob, getorg, geopy
+# Each distinct location is geocoded once: results are kept in
+# ../talkmap/geocode-cache.json, and only locations not in it are sent to
+# Nominatim, about one per second (see geocache.py).
+#
+# Requires: getorg, geopy, pyyaml
 
-import glob
 import getorg
 from geopy import Nominatim
 
-g = glob.glob("*.md")
+from geocache import GeoCache, geocode_all
+from siteindex import FrontMatterIndex
 
+index = FrontMatterIndex()
+index.update()
+locations = [talk["location"] for talk in index.query("_talks", "location")]
 
-geocoder = Nominatim()
-location_dict = {}
-location = ""
-permalink = ""
-title = ""
+geocoder = Nominatim(user_agent="talkmap")
 
 
-for file in g:
-    with open(file, 'r') as f:
-        lines = f.read()
-        if lines.find('location: "') > 1:
-            loc_start = lines.find('location: "') + 11
-            lines_trim = lines[loc_start:]
-            loc_end = lines_trim.find('"')
-            location = lines_trim[:loc_end]
-                            
-           
-        location_dict[location] = geocoder.geocode(location)
-        print(location, "\n", location_dict[location])
+location_dict = geocode_all(locations, geocoder, GeoCache())
+for location, place in location_dict.items():
+    print(location, "\n", place)
 
 
 m = getorg.orgmap.create_map_obj()